@@ -0,0 +1,317 @@
+import random
+import time
+
+from .tablebase import WIN, LOSS
+from .transposition import TranspositionTable, EXACT, LOWER, UPPER
+
+# score of a won position, reduced by the ply it is reached at so the search
+# prefers the fastest win and the slowest loss
+WIN_SCORE = 100000
+
+# evaluation weights for each captured red marble and each marble of material lead
+RED_WEIGHT = 100
+MARBLE_WEIGHT = 60
+
+# how many nodes are searched between checks of the wall clock
+_CHECK_INTERVAL = 64
+
+
+def _score_to_table(score, ply):
+    """
+    Takes a score at ply and returns it as stored in the transposition table,
+    with win scores counted from the position instead of from the root.
+    """
+    if score >= WIN_SCORE - 1000:
+        return score + ply
+    if score <= -WIN_SCORE + 1000:
+        return score - ply
+    return score
+
+
+def _score_from_table(score, ply):
+    """Takes a score stored in the transposition table and returns it as a score at ply"""
+    if score >= WIN_SCORE - 1000:
+        return score - ply
+    if score <= -WIN_SCORE + 1000:
+        return score + ply
+    return score
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the time budget for a move runs out or the search is stopped"""
+    pass
+
+
+class AlphaBetaPlayer:
+    """
+    Computer player for the KubaGame.
+    It searches the game tree with negamax and alpha-beta pruning, deepening
+    one ply at a time until the time budget for the move runs out, and plays the
+    best move of the deepest search it completed. Moves that capture a marble
+    or push a red marble are searched first, after the best move found by the
+    previous iteration or stored in the transposition table. The search makes
+    and takes back moves in place on the game with apply_move and undo_move, so
+    the game is unchanged afterwards.
+    The transposition table is keyed by position_key, which does not include
+    the ko history, so a stored score can in rare cases ignore a ko move.
+    If an opening book is given, a book move is played without searching.
+    If an endgame tablebase is given, positions in it are scored from the
+    table instead of being searched.
+    """
+    def __init__(self, time_limit=0.1, max_depth=64, tt_size_mb=16, book=None, tablebase=None):
+        """
+        Initializing the player with the time budget per move in seconds, the
+        deepest search it will try, the memory cap of its transposition table
+        in megabytes, an optional OpeningBook and an optional Tablebase.
+        """
+        self._time_limit = time_limit
+        self._max_depth = max_depth
+        self._table = TranspositionTable(tt_size_mb)
+        self._book = book
+        self._tablebase = tablebase
+        self._deadline = None
+        self._stop = None
+        self._nodes = 0
+        self._score = 0
+        self._depth = 0
+        self._pv = []
+        self._pv_table = []
+
+    def get_nodes(self):
+        """Returns the number of nodes searched for the last move"""
+        return self._nodes
+
+    def get_score(self):
+        """Returns the score of the last move from the point of view of the player moving"""
+        return self._score
+
+    def get_depth(self):
+        """Returns the depth of the deepest search completed for the last move"""
+        return self._depth
+
+    def search(self, game, playername, time_limit=None, stop=None):
+        """
+        Takes a game and the name of the player to move and searches for the
+        player's best move within the time budget.
+        It takes an optional time limit in seconds that replaces the player's
+        budget for this search, and an optional stop function that is checked
+        along with the clock and ends the search early when it returns True.
+        Returns a tuple of the best move as (coordinates, direction) and the
+        principal variation as a list of moves starting with the best move.
+        Returns (None, []) if the player has no legal moves.
+        """
+        if time_limit is None:
+            time_limit = self._time_limit
+        self._deadline = time.perf_counter() + time_limit
+        self._stop = stop
+        self._nodes = 0
+        self._score = 0
+        self._depth = 0
+        self._pv = []
+
+        if self._book is not None:
+            move = self._book.probe(game, playername)
+            if move is not None:
+                self._pv = [move]
+                return (move, [move])
+
+        self._table.new_search()
+
+        moves = game.legal_moves(playername)
+        if not moves:
+            return (None, [])
+        if len(moves) == 1:
+            self._pv = [moves[0]]
+            return (moves[0], list(self._pv))
+
+        opponent = game.get_opponent(playername)
+        for depth in range(1, self._max_depth + 1):
+            self._pv_table = [[] for _ in range(depth + 1)]
+            try:
+                score = self._negamax(game, playername, opponent, depth, 0, -WIN_SCORE - 1, WIN_SCORE + 1)
+            except SearchTimeout:
+                break
+            self._score = score
+            self._depth = depth
+            self._pv = self._pv_table[0]
+            # stop deepening once the result of the game is known
+            if abs(score) >= WIN_SCORE - self._max_depth:
+                break
+
+        if not self._pv:
+            self._pv = [self._order_moves(game, playername, moves, 0)[0]]
+        return (self._pv[0], list(self._pv))
+
+    def evaluate(self, game, playername):
+        """
+        Takes a game and a player's name and returns the score of the position
+        from the player's point of view, using captured red marbles and the
+        difference in marbles left on the board.
+        """
+        opponent = game.get_opponent(playername)
+        white, black, red = game.get_marble_count()
+        if game.get_color(playername) == "W":
+            material = white - black
+        else:
+            material = black - white
+        captured = game.get_captured(playername) - game.get_captured(opponent)
+        return RED_WEIGHT * captured + MARBLE_WEIGHT * material
+
+    def _negamax(self, game, playername, opponent, depth, ply, alpha, beta):
+        """
+        Searches the position to depth plies with alpha-beta pruning and returns
+        its score for the player to move, filling the principal variation table.
+        """
+        self._nodes += 1
+        if self._nodes % _CHECK_INTERVAL == 0:
+            if time.perf_counter() >= self._deadline or (self._stop is not None and self._stop()):
+                raise SearchTimeout()
+
+        pv_table = self._pv_table
+        pv_table[ply] = []
+        winner = game.get_winner()
+        if winner is not None:
+            if winner == playername:
+                return WIN_SCORE - ply
+            return -WIN_SCORE + ply
+        # the tablebase knows the result of the position and how many moves
+        # it takes with best play
+        if self._tablebase is not None and ply > 0:
+            solved = self._tablebase.probe_game(game, playername)
+            if solved is not None:
+                result, distance = solved
+                if result == WIN:
+                    return WIN_SCORE - ply - distance
+                if result == LOSS:
+                    return -WIN_SCORE + ply + distance
+                return 0
+        if depth == 0:
+            return self.evaluate(game, playername)
+
+        # use the stored result of an earlier search of the position if it
+        # went at least as deep, except at the root where the move is needed
+        key = game.position_key()
+        entry = self._table.probe(key)
+        table_move = None
+        if entry is not None:
+            entry_depth, entry_score, bound, table_move = entry
+            if entry_depth >= depth and ply > 0:
+                entry_score = _score_from_table(entry_score, ply)
+                if bound == EXACT:
+                    return entry_score
+                if bound == LOWER and entry_score >= beta:
+                    return entry_score
+                if bound == UPPER and entry_score <= alpha:
+                    return entry_score
+
+        moves = game.legal_moves(playername)
+        if not moves:
+            # a player who has no legal moves available has lost the game
+            return -WIN_SCORE + ply
+
+        alpha_start = alpha
+        best = -WIN_SCORE - 1
+        best_move = None
+        for move in self._order_moves(game, playername, moves, ply, table_move):
+            record = game.apply_move(playername, move[0], move[1])
+            try:
+                score = -self._negamax(game, opponent, playername, depth - 1, ply + 1, -beta, -alpha)
+            finally:
+                game.undo_move(record)
+            if score > best:
+                best = score
+                best_move = move
+                if score > alpha:
+                    alpha = score
+                    pv_table[ply] = [move] + pv_table[ply + 1]
+                    if alpha >= beta:
+                        break
+
+        if best <= alpha_start:
+            bound = UPPER
+        elif best >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self._table.store(key, depth, _score_to_table(best, ply), bound, best_move)
+        return best
+
+    def _order_moves(self, game, playername, moves, ply, table_move=None):
+        """
+        Takes the legal moves at a node and returns them sorted so the move from
+        the previous principal variation comes first, then the best move stored
+        in the transposition table, moves that push off a red marble, moves that
+        push off an opponent marble, moves that push a red marble, and the rest.
+        """
+        bitboard = game.get_game_board().get_bitboard()
+        red = bitboard.get_state()[2]
+        pv_move = None
+        if ply < len(self._pv):
+            pv_move = self._pv[ply]
+
+        def order_key(move):
+            if move == pv_move:
+                return -5
+            if move == table_move:
+                return -4
+            line, captured = bitboard.preview_push(move[0], move[1])
+            if captured == "R":
+                return -3
+            if captured != "X":
+                return -2
+            if line & red:
+                return -1
+            return 0
+
+        return sorted(moves, key=order_key)
+
+
+class RandomPlayer:
+    """Computer player for the KubaGame that plays a uniformly random legal move"""
+    def __init__(self, seed=None):
+        """Initializing the player with an optional random seed"""
+        self._rng = random.Random(seed)
+
+    def search(self, game, playername):
+        """
+        Takes a game and the name of the player to move and returns a tuple of a
+        random legal move and a principal variation of just that move.
+        Returns (None, []) if the player has no legal moves.
+        """
+        moves = game.legal_moves(playername)
+        if not moves:
+            return (None, [])
+        move = moves[self._rng.randrange(len(moves))]
+        return (move, [move])
+
+
+class GreedyPlayer:
+    """
+    Computer player for the KubaGame that pushes off a red marble if it can,
+    otherwise an opponent marble, otherwise plays a random legal move.
+    """
+    def __init__(self, seed=None):
+        """Initializing the player with an optional random seed"""
+        self._rng = random.Random(seed)
+
+    def search(self, game, playername):
+        """
+        Takes a game and the name of the player to move and returns a tuple of
+        the greedy move and a principal variation of just that move.
+        Returns (None, []) if the player has no legal moves.
+        """
+        moves = game.legal_moves(playername)
+        if not moves:
+            return (None, [])
+        bitboard = game.get_game_board().get_bitboard()
+        reds = []
+        captures = []
+        for move in moves:
+            captured = bitboard.preview_push(move[0], move[1])[1]
+            if captured == "R":
+                reds.append(move)
+            elif captured != "X":
+                captures.append(move)
+        choices = reds or captures or moves
+        move = choices[self._rng.randrange(len(choices))]
+        return (move, [move])
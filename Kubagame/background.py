@@ -0,0 +1,192 @@
+import asyncio
+import copy
+import multiprocessing
+import queue
+import threading
+
+from .ai import AlphaBetaPlayer
+from .tournament import make_bot, parse_bot
+
+# search time of a ponder, which runs until the next submit or cancel
+PONDER_TIME = float("inf")
+
+
+def _serve(spec, seed, requests, results, current):
+    """
+    Worker loop of a BackgroundBot, run in a thread or a process.
+    It makes the bot from its spec, then takes (job, game, playername, ponder)
+    requests until None, searches each one while current.value is the job id
+    and puts (job, move, pv, error) on results for every search that is not a
+    ponder. If the bot cannot be made, every search fails with the error.
+    """
+    bot, failure = None, None
+    try:
+        bot = make_bot(spec, seed)
+    except Exception as exception:
+        failure = "%s: %s" % (type(exception).__name__, exception)
+    try:
+        while True:
+            request = requests.get()
+            if request is None:
+                return
+            job, game, playername, ponder = request
+            if current.value != job:
+                continue
+            move, pv, error = None, [], failure
+            try:
+                if bot is None:
+                    pass
+                elif isinstance(bot, AlphaBetaPlayer):
+                    time_limit = PONDER_TIME if ponder else None
+                    move, pv = bot.search(game, playername, time_limit, lambda: current.value != job)
+                elif not ponder:
+                    move, pv = bot.search(game, playername)
+            except Exception as exception:
+                error = "%s: %s" % (type(exception).__name__, exception)
+            if not ponder:
+                results.put((job, move, pv, error))
+    finally:
+        if hasattr(bot, "close"):
+            bot.close()
+
+
+class BackgroundBot:
+    """
+    Runs a computer player in a worker so its search never runs on the thread
+    that draws the game. The bot is given as a tournament bot spec such as
+    "alphabeta:time_limit=2", and is made inside the worker.
+    A position is submitted with submit, and the best move is taken with poll,
+    wait or wait_async. Submitting another position or calling cancel stops
+    the search that is running.
+    By default the worker is a separate process, so a deep search does not hold
+    the interpreter lock the drawing thread needs; a thread worker shares it.
+    With an alpha-beta bot, ponder searches the position while the opponent
+    thinks. Its result is never returned, but it fills the bot's transposition
+    table, so the search of the next submitted position gets deeper sooner.
+    """
+    def __init__(self, spec, seed=None, use_process=True):
+        """
+        Initializing the bot from a bot spec and a random seed and starting its
+        worker, a process if use_process is True and a thread otherwise.
+        Raises ValueError for an unknown bot or a badly formed option.
+        """
+        parse_bot(spec)
+        context = multiprocessing.get_context("spawn")
+        self._current = context.Value("q", -1)
+        self._next_job = 0
+        self._job = None
+        if use_process:
+            self._requests = context.Queue()
+            self._results = context.Queue()
+            self._worker = context.Process(target=_serve, daemon=True,
+                                           args=(spec, seed, self._requests, self._results, self._current))
+        else:
+            self._requests = queue.Queue()
+            self._results = queue.Queue()
+            self._worker = threading.Thread(target=_serve, daemon=True,
+                                            args=(spec, seed, self._requests, self._results, self._current))
+        self._worker.start()
+
+    def _start(self, game, playername, ponder):
+        """Stops the running search and starts a search of a copy of the game, returning its job id"""
+        if self._worker is None:
+            raise ValueError("the bot is closed")
+        job = self._next_job
+        self._next_job += 1
+        self._current.value = job
+        # copy now, the game can change before the worker gets to it
+        self._requests.put((job, copy.deepcopy(game), playername, ponder))
+        return job
+
+    def submit(self, game, playername):
+        """
+        Takes a game and the name of the player the bot plays, whose turn it is,
+        and starts searching for the player's move, stopping any search or
+        ponder that is running. The game is copied, so it can change while the
+        bot thinks. Returns the id of the search.
+        """
+        self._job = self._start(game, playername, False)
+        return self._job
+
+    def ponder(self, game, playername):
+        """
+        Takes a game and the name of the opponent, whose turn it is, and
+        searches the position on the opponent's time until the next submit or
+        cancel, stopping any search that is running.
+        """
+        self._job = None
+        self._start(game, playername, True)
+
+    def cancel(self):
+        """Stops the search or ponder that is running, its move is never returned"""
+        self._job = None
+        self._current.value = -1
+
+    def is_busy(self):
+        """Returns True if a submitted search has not been taken with poll or wait yet"""
+        return self._job is not None
+
+    def _take(self, result):
+        """
+        Takes a (job, move, pv, error) result and returns (move, pv) if it is
+        the result of the submitted search, or None for a stopped search.
+        Raises RuntimeError if the search failed.
+        """
+        job, move, pv, error = result
+        if job != self._job:
+            return None
+        self._job = None
+        if error is not None:
+            raise RuntimeError("bot search failed, %s" % error)
+        return (move, pv)
+
+    def poll(self):
+        """
+        Returns the (move, pv) found for the submitted position if the search
+        has finished, or None if it is still running or nothing was submitted.
+        The move is None if the player has no legal moves.
+        """
+        while self._job is not None:
+            try:
+                result = self._results.get_nowait()
+            except queue.Empty:
+                return None
+            taken = self._take(result)
+            if taken is not None:
+                return taken
+        return None
+
+    def wait(self, timeout=None):
+        """
+        Waits up to timeout seconds, or until it finishes if timeout is None,
+        for the search of the submitted position and returns its (move, pv) as
+        poll does. Returns None on a timeout or if nothing was submitted.
+        """
+        while self._job is not None:
+            try:
+                result = self._results.get(timeout=timeout)
+            except queue.Empty:
+                return None
+            taken = self._take(result)
+            if taken is not None:
+                return taken
+        return None
+
+    async def wait_async(self):
+        """Waits for the search of the submitted position without blocking the event loop, as wait does"""
+        return await asyncio.get_running_loop().run_in_executor(None, self.wait)
+
+    def close(self):
+        """Stops the search and the worker"""
+        if self._worker is None:
+            return
+        self.cancel()
+        self._requests.put(None)
+        self._worker.join(timeout=5)
+        self._worker = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,228 @@
+import numpy as np
+
+from .bitboard import ROWS, COLS, DIRECTIONS
+from .board import standard_layout
+
+# int8 codes of the cells of a batch board
+CELL_CODES = {"X": 0, "W": 1, "B": 2, "R": 3}
+
+# (row step, column step) a marble travels when pushed, indexed like DIRECTIONS
+_ROW_STEPS = np.array([0, 0, -1, 1], dtype=np.int64)
+_COLUMN_STEPS = np.array([-1, 1, 0, 0], dtype=np.int64)
+
+_STARTING_BOARD = np.array([[CELL_CODES[item] for item in row] for row in standard_layout(ROWS)], dtype=np.int8)
+
+_RAY_STEPS = np.arange(max(ROWS, COLS))
+
+# every (coordinates, direction) move as arrays, in encode_move order
+_MOVE_ROWS = np.repeat(np.arange(ROWS * COLS) // COLS, len(DIRECTIONS))
+_MOVE_COLUMNS = np.repeat(np.arange(ROWS * COLS) % COLS, len(DIRECTIONS))
+_MOVE_DIRECTIONS = np.tile(np.arange(len(DIRECTIONS)), ROWS * COLS)
+
+
+class BatchKubaGame:
+    """
+    Batch of KubaGames stepped together with NumPy.
+    The boards of all games are held in one (N, 7, 7) int8 array using the
+    codes in CELL_CODES, with vectors for the red marbles captured by each
+    player, the player whose turn it is and the winner. Players are numbered
+    0 and 1 and play the same colors in every game. One move per game is
+    applied per step with the same rules as KubaGame.make_move, using array
+    operations over the whole batch instead of a loop over games.
+    Directions are given as indexes into DIRECTIONS ("L", "R", "F", "B").
+    """
+    def __init__(self, games, colors=("W", "B")):
+        """
+        Initializing the batch with the number of games and the colors of
+        player 0 and player 1. Every game starts from the starting board with
+        no turn set, so either player can move first.
+        """
+        self._colors = np.array([CELL_CODES[colors[0]], CELL_CODES[colors[1]]], dtype=np.int8)
+        self._boards = np.repeat(_STARTING_BOARD[None], games, axis=0)
+        # a board that can never match, standing in for no previous board
+        self._previous = np.full_like(self._boards, -1)
+        self._captured = np.zeros((games, 2), dtype=np.int16)
+        self._turn = np.full(games, -1, dtype=np.int8)
+        self._winner = np.full(games, -1, dtype=np.int8)
+
+    def get_boards(self):
+        """Returns the (N, 7, 7) array of boards"""
+        return self._boards
+
+    def get_captured(self):
+        """Returns the (N, 2) array of red marbles captured by player 0 and player 1"""
+        return self._captured
+
+    def get_turn(self):
+        """Returns the (N,) array of the player whose turn it is, -1 before the first move"""
+        return self._turn
+
+    def get_winner(self):
+        """Returns the (N,) array of the winning player, -1 if the game has not been won"""
+        return self._winner
+
+    def get_marble_count(self):
+        """Returns an (N, 3) array of marble counts in order of (White, Black, Red)"""
+        boards = self._boards
+        return np.stack([(boards == CELL_CODES["W"]).sum(axis=(1, 2)),
+                         (boards == CELL_CODES["B"]).sum(axis=(1, 2)),
+                         (boards == CELL_CODES["R"]).sum(axis=(1, 2))], axis=1)
+
+    def reset(self, games=None):
+        """Takes an optional boolean mask or index array of games and puts them back to the start"""
+        if games is None:
+            games = slice(None)
+        self._boards[games] = _STARTING_BOARD
+        self._previous[games] = -1
+        self._captured[games] = 0
+        self._turn[games] = -1
+        self._winner[games] = -1
+
+    def _resolve(self, games, players, rows, columns, directions):
+        """
+        Takes arrays of game indexes, players, rows, columns and directions of
+        candidate moves and works out each push without changing the boards.
+        Returns the mask of valid moves, the marble code pushed off (0 if none),
+        the flat board indexes of each move's ray, the new ray values and the
+        mask of ray cells that change.
+        """
+        boards = self._boards.reshape(-1)
+        previous_boards = self._previous.reshape(-1)
+        count = len(games)
+        valid = ((rows >= 0) & (rows < ROWS) & (columns >= 0) & (columns < COLS)
+                 & (directions >= 0) & (directions < len(DIRECTIONS)))
+        rows = np.where(valid, rows, 0)
+        columns = np.where(valid, columns, 0)
+        directions = np.where(valid, directions, 0)
+        row_steps = _ROW_STEPS[directions]
+        column_steps = _COLUMN_STEPS[directions]
+        colors = self._colors[players]
+        offsets = games * (ROWS * COLS)
+
+        # the cell behind the marble must be empty or off the board
+        behind_rows = rows - row_steps
+        behind_columns = columns - column_steps
+        behind_on = (behind_rows >= 0) & (behind_rows < ROWS) & (behind_columns >= 0) & (behind_columns < COLS)
+        behind = boards.take(offsets + np.where(behind_on, behind_rows * COLS + behind_columns, 0))
+        valid &= ~(behind_on & (behind != 0))
+
+        # the cells from the marble to the edge it is pushed toward
+        ray_rows = rows[:, None] + row_steps[:, None] * _RAY_STEPS
+        ray_columns = columns[:, None] + column_steps[:, None] * _RAY_STEPS
+        on_board = (ray_rows >= 0) & (ray_rows < ROWS) & (ray_columns >= 0) & (ray_columns < COLS)
+        cells = offsets[:, None] + np.where(on_board, ray_rows * COLS + ray_columns, 0)
+        current = boards.take(cells)
+        values = np.where(on_board, current, -1)
+        valid &= values[:, 0] == colors
+
+        # the pushed line ends at the first empty cell, or falls off the edge
+        empty = values == 0
+        has_empty = empty.any(axis=1)
+        length = on_board.sum(axis=1)
+        end = np.where(has_empty, empty.argmax(axis=1), length - 1)
+        captured = np.where(has_empty, 0, values[np.arange(count), length - 1])
+        valid &= captured != colors
+
+        shifted = np.concatenate([np.zeros((count, 1), dtype=values.dtype), values[:, :-1]], axis=1)
+        changed = _RAY_STEPS[None, :] <= end[:, None]
+        new_values = np.where(changed, shifted, values)
+
+        # check if move undo a move that opponent just made, the board after the
+        # push must differ from the board before the opponent's move either
+        # outside the ray or on it
+        previous = previous_boards.take(cells)
+        on_ray_differences = ((current != previous) & on_board).sum(axis=1)
+        differences = (self._boards != self._previous).sum(axis=(1, 2))[games]
+        repeats = (differences == on_ray_differences) & ((new_values == previous) | ~on_board).all(axis=1)
+        valid &= ~repeats
+        return (valid, captured, cells, new_values, changed & on_board)
+
+    def legal_moves_mask(self, players=None):
+        """
+        Takes an optional array of the player to move in each game, by default
+        the player whose turn it is or player 0 before the first move, and
+        returns an (N, 196) boolean array of the legal moves of each game,
+        indexed by the move codes of encode_move.
+        """
+        boards = self._boards
+        if players is None:
+            players = np.where(self._turn < 0, 0, self._turn)
+        players = np.asarray(players, dtype=np.int64)
+
+        # only pushes of the player's own marbles with the cell behind empty or
+        # off the board are resolved in full
+        own = boards == self._colors[players][:, None, None]
+        occupied = np.pad(boards != 0, ((0, 0), (1, 1), (1, 1)))
+        candidates = np.empty(boards.shape + (len(DIRECTIONS),), dtype=bool)
+        for direction in range(len(DIRECTIONS)):
+            row_start = 1 - _ROW_STEPS[direction]
+            column_start = 1 - _COLUMN_STEPS[direction]
+            behind = occupied[:, row_start:row_start + ROWS, column_start:column_start + COLS]
+            candidates[..., direction] = own & ~behind
+        candidates = candidates.reshape(len(boards), -1)
+        game_index, codes = np.nonzero(candidates)
+        valid = self._resolve(game_index, players[game_index], _MOVE_ROWS[codes],
+                              _MOVE_COLUMNS[codes], _MOVE_DIRECTIONS[codes])[0]
+
+        legal = np.zeros(candidates.shape, dtype=bool)
+        legal[game_index, codes] = valid
+        turn_ok = (self._turn < 0) | (self._turn == players)
+        return legal & (turn_ok & (self._winner < 0))[:, None]
+
+    def step(self, players, rows, columns, directions):
+        """
+        Takes arrays of the player, row, column and direction index of one move
+        per game and makes every valid move, the same way as make_move.
+        Returns the (N,) boolean array of the games where the move was valid;
+        the other games are left unchanged.
+        """
+        players = np.asarray(players, dtype=np.int64)
+        rows = np.asarray(rows, dtype=np.int64)
+        columns = np.asarray(columns, dtype=np.int64)
+        directions = np.asarray(directions, dtype=np.int64)
+        games = np.arange(len(self._boards))
+        # a move by a player that is neither 0 nor 1 is invalid, the clipped
+        # copy only keeps the indexing below in range
+        known = (players == 0) | (players == 1)
+        players = np.clip(players, 0, 1)
+
+        valid, captured, cells, new_values, changed = self._resolve(
+            games, players, rows, columns, directions)
+        valid &= known
+        valid &= (self._turn < 0) | (self._turn == players)
+        valid &= self._winner < 0
+
+        # saves board into previous state of board and writes the pushed rays
+        self._previous[valid] = self._boards[valid]
+        write = changed & valid[:, None]
+        self._boards.reshape(-1)[cells[write]] = new_values[write]
+
+        red_captures = valid & (captured == CELL_CODES["R"])
+        self._captured[red_captures, players[red_captures]] += 1
+        self._turn[valid] = 1 - players[valid]
+
+        # check for winner with 7 red marbles or an opponent with 0 marbles
+        winner = self._winner
+        for player in (0, 1):
+            winner[valid & (self._captured[:, player] == 7)] = player
+        counts = self.get_marble_count()
+        for color, other in (("W", "B"), ("B", "W")):
+            for player in (0, 1):
+                if self._colors[player] == CELL_CODES[other]:
+                    winner[valid & (counts[:, "WB".index(color)] == 0)] = player
+        return valid
+
+    def step_random(self, rng):
+        """
+        Takes a numpy random Generator and makes a uniformly random legal move
+        in every game that is not over, for the player whose turn it is or
+        player 0 before the first move.
+        Returns the (N,) boolean array of the games where a move was made.
+        """
+        players = np.where(self._turn < 0, 0, self._turn)
+        legal = self.legal_moves_mask(players)
+        keys = np.where(legal, rng.random(legal.shape), -1.0)
+        codes = keys.argmax(axis=1)
+        has_move = legal.any(axis=1)
+        rows = np.where(has_move, _MOVE_ROWS[codes], -1)
+        return self.step(players, rows, _MOVE_COLUMNS[codes], _MOVE_DIRECTIONS[codes]) & has_move
@@ -0,0 +1,306 @@
+import argparse
+import copy
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from .ai import AlphaBetaPlayer
+from .bitboard import ROWS, COLS, DIRECTIONS
+from .game import KubaGame
+
+# seed of every random choice in the suite, so each run measures the same work
+SEED = 20210601
+
+# a benchmark slower than its baseline by more than this fraction is a regression
+THRESHOLD = 0.15
+
+# moves of random play used to reach the positions the suite measures on
+_POSITION_PLIES = (0, 4, 10, 20, 35, 50)
+
+
+def _positions(count, seed=SEED):
+    """
+    Returns a list of count (game, name of the player to move) reached by
+    random play from the starting position, with the same games every run.
+    """
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        game = KubaGame(("white", "W"), ("black", "B"))
+        playername = "white"
+        for _ in range(rng.choice(_POSITION_PLIES)):
+            moves = game.legal_moves(playername)
+            if not moves:
+                break
+            game.make_move(playername, *rng.choice(moves))
+            playername = game.get_opponent(playername)
+        if game.get_winner() is None and game.legal_moves(playername):
+            positions.append((game, playername))
+    return positions
+
+
+def _rejected_moves(game, playername, direction):
+    """Returns the moves in direction that make_move rejects in the position"""
+    legal = set(game.legal_moves(playername))
+    return [((row, column), direction) for row in range(ROWS) for column in range(COLS)
+            if ((row, column), direction) not in legal]
+
+
+def bench_make_move(direction, legal, count=2000):
+    """
+    Returns a benchmark of count make_move calls in direction, of legal moves
+    or of rejected moves. A legal move changes the game, so each one is made
+    on its own copy, prepared before the clock starts.
+    """
+    def run():
+        rng = random.Random(SEED)
+        calls = []
+        for game, playername in _positions(50):
+            if legal:
+                moves = [move for move in game.legal_moves(playername) if move[1] == direction]
+            else:
+                moves = _rejected_moves(game, playername, direction)
+            if moves:
+                calls.append((game, playername, moves))
+        work = []
+        for _ in range(count):
+            game, playername, moves = rng.choice(calls)
+            if legal:
+                game = copy.deepcopy(game)
+            work.append((game.make_move, playername) + rng.choice(moves))
+        start = time.perf_counter()
+        for make_move, playername, coordinates, move_direction in work:
+            make_move(playername, coordinates, move_direction)
+        return (count, time.perf_counter() - start)
+    return run
+
+
+def bench_get_marble_count(count=200000):
+    """Returns a benchmark of count get_marble_count calls"""
+    def run():
+        games = [game for game, playername in _positions(20)]
+        calls = count // len(games)
+        start = time.perf_counter()
+        for game in games:
+            get_marble_count = game.get_marble_count
+            for _ in range(calls):
+                get_marble_count()
+        return (calls * len(games), time.perf_counter() - start)
+    return run
+
+
+def bench_get_marble(count=200000):
+    """Returns a benchmark of count get_marble calls on random cells"""
+    def run():
+        rng = random.Random(SEED)
+        games = [game for game, playername in _positions(20)]
+        cells = [(rng.randrange(ROWS), rng.randrange(COLS)) for _ in range(count // len(games))]
+        start = time.perf_counter()
+        for game in games:
+            get_marble = game.get_marble
+            for coordinates in cells:
+                get_marble(coordinates)
+        return (len(cells) * len(games), time.perf_counter() - start)
+    return run
+
+
+def bench_playout(games=20, max_moves=500):
+    """Returns a benchmark of games full random games, counted in games"""
+    def run():
+        rng = random.Random(SEED)
+        start = time.perf_counter()
+        for _ in range(games):
+            game = KubaGame(("white", "W"), ("black", "B"))
+            playername = "white"
+            for _ in range(max_moves):
+                moves = game.legal_moves(playername)
+                if not moves:
+                    break
+                game.make_move(playername, *rng.choice(moves))
+                if game.get_winner() is not None:
+                    break
+                playername = game.get_opponent(playername)
+        return (games, time.perf_counter() - start)
+    return run
+
+
+def bench_search(positions=5, time_limit=0.2):
+    """Returns a benchmark of the alpha-beta search, counted in nodes"""
+    def run():
+        nodes = 0
+        elapsed = 0.0
+        for game, playername in _positions(positions):
+            player = AlphaBetaPlayer(time_limit=time_limit)
+            start = time.perf_counter()
+            player.search(game, playername)
+            elapsed += time.perf_counter() - start
+            nodes += player.get_nodes()
+        return (nodes, elapsed)
+    return run
+
+
+def bench_draw_grid(frames=200):
+    """
+    Returns a benchmark of draw_grid, counted in frames drawn to an
+    off-screen surface. It is skipped if pygame cannot be used.
+    """
+    def run():
+        try:
+            import pygame
+            from .constants import WIDTH, HEIGHT
+            from .render import draw_grid
+        except ImportError:
+            return None
+        surface = pygame.Surface((WIDTH, HEIGHT))
+        start = time.perf_counter()
+        for _ in range(frames):
+            draw_grid(surface)
+        return (frames, time.perf_counter() - start)
+    return run
+
+
+def bench_session_memory(count=20000):
+    """
+    Returns a benchmark of the memory a parked game holds, in bytes per game,
+    measured with tracemalloc over count games that have each made a move.
+    """
+    def run():
+        games = []
+        tracemalloc.start()
+        try:
+            start = tracemalloc.get_traced_memory()[0]
+            for _ in range(count):
+                game = KubaGame(("white", "W"), ("black", "B"))
+                game.make_move("white", (6, 5), "F")
+                games.append(game)
+            used = tracemalloc.get_traced_memory()[0] - start
+        finally:
+            tracemalloc.stop()
+        return used / count
+    return run
+
+
+# name, unit counted and benchmark of every benchmark in the suite, in order
+BENCHMARKS = []
+for _direction in DIRECTIONS:
+    BENCHMARKS.append(("make_move_legal_" + _direction, "calls", bench_make_move(_direction, True, 5000)))
+for _direction in DIRECTIONS:
+    BENCHMARKS.append(("make_move_rejected_" + _direction, "calls", bench_make_move(_direction, False, 20000)))
+BENCHMARKS.extend([
+    ("get_marble_count", "calls", bench_get_marble_count()),
+    ("get_marble", "calls", bench_get_marble()),
+    ("playout", "games", bench_playout()),
+    ("search", "nodes", bench_search()),
+    ("draw_grid", "frames", bench_draw_grid()),
+])
+
+# name and benchmark of every memory benchmark in the suite, in bytes
+MEMORY_BENCHMARKS = [
+    ("session_memory", bench_session_memory()),
+]
+
+
+def run_suite(names=None, repeat=5, progress=None):
+    """
+    Takes the names of the benchmarks to run (all if None), the number of
+    times to run each and an optional progress callable given each result,
+    and returns a dict of {name: {"unit": unit, "rate": units per second}}
+    with the best rate of the runs. Benchmarks that are skipped are left out.
+    Memory benchmarks are run once and give {"unit": "bytes", "bytes": bytes}.
+    """
+    results = {}
+    for name, unit, benchmark in BENCHMARKS:
+        if names is not None and name not in names:
+            continue
+        best = None
+        for _ in range(repeat):
+            outcome = benchmark()
+            if outcome is None:
+                break
+            count, elapsed = outcome
+            rate = count / max(elapsed, 1e-9)
+            if best is None or rate > best:
+                best = rate
+        if best is None:
+            continue
+        results[name] = {"unit": unit, "rate": best}
+        if progress:
+            progress(name, results[name])
+    for name, benchmark in MEMORY_BENCHMARKS:
+        if names is not None and name not in names:
+            continue
+        results[name] = {"unit": "bytes", "bytes": benchmark()}
+        if progress:
+            progress(name, results[name])
+    return results
+
+
+def compare(results, baseline, threshold=THRESHOLD):
+    """
+    Takes the results of run_suite, a baseline in the same form and the
+    fraction a rate may drop, or memory grow, and returns a tuple of the report
+    text and the list of names of the benchmarks that regressed.
+    """
+    lines = ["%-24s %14s %14s %8s" % ("benchmark", "baseline", "current", "change")]
+    regressions = []
+    for name, result in results.items():
+        field = "bytes" if "bytes" in result else "rate"
+        unit = result["unit"] if field == "bytes" else result["unit"] + "/s"
+        value = result[field]
+        base = baseline.get(name)
+        if base is None or field not in base:
+            lines.append("%-24s %14s %14.0f %8s  %s" % (name, "-", value, "new", unit))
+            continue
+        change = value / base[field] - 1
+        flag = ""
+        if (field == "rate" and change < -threshold) or (field == "bytes" and change > threshold):
+            flag = "  REGRESSION"
+            regressions.append(name)
+        lines.append("%-24s %14.0f %14.0f %+7.1f%%  %s%s"
+                     % (name, base[field], value, change * 100, unit, flag))
+    return ("\n".join(lines), regressions)
+
+
+def main(argv=None):
+    """Command-line entry point, run with python -m Kubagame.bench"""
+    parser = argparse.ArgumentParser(description="Run the KubaGame benchmark suite.")
+    parser.add_argument("names", nargs="*", help="benchmarks to run, all if none are given")
+    parser.add_argument("--repeat", type=int, default=5, help="runs of each benchmark, the best is kept")
+    parser.add_argument("--save", help="file to record the results to as the new baseline")
+    parser.add_argument("--compare", help="baseline file to compare the results with")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="fraction a rate may drop, or memory grow, before it is a regression")
+    args = parser.parse_args(argv)
+
+    known = [name for name, unit, benchmark in BENCHMARKS] + [name for name, benchmark in MEMORY_BENCHMARKS]
+    for name in args.names:
+        if name not in known:
+            parser.error("unknown benchmark %r, choose from %s" % (name, ", ".join(known)))
+
+    def progress(name, result):
+        if "bytes" in result:
+            print("%-24s %14.0f bytes" % (name, result["bytes"]))
+        else:
+            print("%-24s %14.0f %s/s" % (name, result["rate"], result["unit"]))
+
+    results = run_suite(args.names or None, args.repeat, None if args.compare else progress)
+    if args.save:
+        with open(args.save, "w") as baseline:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(),
+                       "results": results}, baseline, indent=2, sort_keys=True)
+            baseline.write("\n")
+    if args.compare:
+        with open(args.compare) as baseline:
+            report, regressions = compare(results, json.load(baseline)["results"], args.threshold)
+        print(report)
+        if regressions:
+            print("%d regression(s): %s" % (len(regressions), ", ".join(regressions)))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,488 @@
+import random
+
+ROWS, COLS = 7, 7
+
+COLORS = ("W", "B", "R")
+DIRECTIONS = ("L", "R", "F", "B")
+
+# (row step, column step) a marble travels when pushed in each direction
+_STEPS = {"L": (0, -1), "R": (0, 1), "F": (-1, 0), "B": (1, 0)}
+
+# whether a push in each direction moves marbles toward lower bit indexes
+_TOWARD_LOW = {"L": True, "R": False, "F": True, "B": False}
+
+# seed of the Zobrist keys, fixed so keys are the same in every process and run
+_SEED = 0x4B554241
+
+
+def encode_move(coordinates, direction):
+    """
+    Takes coordinates and direction of a move on the 7 x 7 board and returns it
+    encoded as a single integer from 0 to 195, (row * 7 + column) * 4 + direction index.
+    Raises ValueError for coordinates outside the 7 x 7 board, whose codes
+    would run into those of other moves.
+    """
+    row, column = coordinates
+    if row not in range(ROWS) or column not in range(COLS):
+        raise ValueError("only moves on the 7 x 7 board can be encoded, not %r" % (coordinates,))
+    return (row * COLS + column) * 4 + DIRECTIONS.index(direction)
+
+
+def decode_move(code):
+    """Takes a move encoded by encode_move and returns its (coordinates, direction)"""
+    cell, direction = divmod(code, 4)
+    return (divmod(cell, COLS), DIRECTIONS[direction])
+
+
+def popcount(bits):
+    """Takes a non-negative integer and returns the number of bits set in it"""
+    return bin(bits).count("1")
+
+
+# int.bit_count is faster, but only exists from Python 3.10
+if hasattr(int, "bit_count"):
+    popcount = int.bit_count
+
+
+def _build_tables(rows, cols):
+    """
+    Precompute, for every direction and cell of a rows by cols board, the mask
+    of the cell behind the marble, the mask of the line from the marble to the
+    edge it is pushed toward, and the mask of the edge cell at the end of that line.
+    """
+    tables = {}
+    for direction, (row_step, column_step) in _STEPS.items():
+        entries = []
+        for row in range(rows):
+            for column in range(cols):
+                behind = 0
+                behind_row, behind_column = row - row_step, column - column_step
+                if 0 <= behind_row < rows and 0 <= behind_column < cols:
+                    behind = 1 << (behind_row * cols + behind_column)
+                ray = 0
+                edge = 0
+                ray_row, ray_column = row, column
+                while 0 <= ray_row < rows and 0 <= ray_column < cols:
+                    edge = 1 << (ray_row * cols + ray_column)
+                    ray |= edge
+                    ray_row += row_step
+                    ray_column += column_step
+                entries.append((behind, ray, edge))
+        tables[direction] = entries
+    return tables
+
+
+# Zobrist keys of the 7 x 7 board, drawn first so they stay the same as the
+# keys saved in opening books and position indexes
+_rng = random.Random(_SEED)
+ZOBRIST = [[_rng.getrandbits(64) for _ in range(ROWS * COLS)] for _ in COLORS]
+ZOBRIST_TURN = {"W": _rng.getrandbits(64), "B": _rng.getrandbits(64)}
+ZOBRIST_CAPTURED = {"W": [_rng.getrandbits(64) for _ in range(14)],
+                    "B": [_rng.getrandbits(64) for _ in range(14)]}
+
+
+def _build_move_keys(zobrist, rows, cols):
+    """
+    Precompute, for every direction, color and cell of a rows by cols board,
+    the Zobrist change of a marble of that color moving from the cell one step
+    in the direction.
+    """
+    move_keys = {}
+    for direction, (row_step, column_step) in _STEPS.items():
+        per_color = []
+        for keys in zobrist:
+            entries = []
+            for row in range(rows):
+                for column in range(cols):
+                    to_row, to_column = row + row_step, column + column_step
+                    if 0 <= to_row < rows and 0 <= to_column < cols:
+                        entries.append(keys[row * cols + column] ^ keys[to_row * cols + to_column])
+                    else:
+                        entries.append(0)
+            per_color.append(entries)
+        move_keys[direction] = per_color
+    return move_keys
+
+
+class _Geometry:
+    """
+    The precomputed push tables, Zobrist keys and shifts of a board of rows by
+    cols cells, shared by every bitboard of that size.
+    """
+    __slots__ = ("rows", "cols", "tables", "zobrist", "move_keys", "shifts")
+
+    def __init__(self, rows, cols, zobrist):
+        self.rows = rows
+        self.cols = cols
+        self.tables = _build_tables(rows, cols)
+        self.zobrist = zobrist
+        self.move_keys = _build_move_keys(zobrist, rows, cols)
+        # bit shift that moves a marble one cell in each direction
+        self.shifts = {"L": 1, "R": 1, "F": cols, "B": cols}
+
+    def __reduce__(self):
+        """Pickles and copies as the size only, so copies of a bitboard share the cached geometry"""
+        return (get_geometry, (self.rows, self.cols))
+
+
+_GEOMETRIES = {(ROWS, COLS): _Geometry(ROWS, COLS, ZOBRIST)}
+
+
+def get_geometry(rows, cols):
+    """
+    Takes a number of rows and columns and returns the shared geometry of a
+    board of that size, building it the first time the size is used.
+    """
+    geometry = _GEOMETRIES.get((rows, cols))
+    if geometry is None:
+        if rows < 1 or cols < 1:
+            raise ValueError("a board needs at least one row and one column")
+        rng = random.Random(_SEED ^ (rows << 16) ^ cols)
+        zobrist = [[rng.getrandbits(64) for _ in range(rows * cols)] for _ in COLORS]
+        geometry = _Geometry(rows, cols, zobrist)
+        _GEOMETRIES[(rows, cols)] = geometry
+    return geometry
+
+
+def _hash_bits(bits, zobrist):
+    """Takes a list of white, black and red bitboards and their Zobrist keys and returns their hash"""
+    key = 0
+    for index, board in enumerate(bits):
+        while board:
+            low = board & -board
+            key ^= zobrist[index][low.bit_length() - 1]
+            board ^= low
+    return key
+
+
+def _line_hash(move_keys, moved):
+    """
+    Takes the move keys of one color and direction and the mask of the marbles
+    moved from their cells, and returns the change to the Zobrist hash.
+    """
+    key = 0
+    while moved:
+        low = moved & -moved
+        key ^= move_keys[low.bit_length() - 1]
+        moved ^= low
+    return key
+
+
+def _bit_item(bits, bit):
+    """Takes the (white, black, red) bitboards and a single cell bit and returns the marble in the cell"""
+    if bits[0] & bit:
+        return "W"
+    if bits[1] & bit:
+        return "B"
+    if bits[2] & bit:
+        return "R"
+    return "X"
+
+
+def _push_line(direction, ray, empty):
+    """
+    Takes a direction, the ray mask from a marble to the edge and the empty
+    cells on that ray, and returns the mask of the marbles pushed, which run
+    from the marble up to the first empty cell.
+    """
+    if _TOWARD_LOW[direction]:
+        return ray & ~((1 << empty.bit_length()) - 1)
+    return ray & ((empty & -empty) - 1)
+
+
+class BitBoard:
+    """
+    Bitboard representation of the Kuba board.
+    Each marble color is stored as a single integer in which bit row * cols + column
+    is set when a marble of that color is in the cell. A push moves a whole line
+    of marbles at once with a few masks and shifts, so the Board class can make
+    moves without walking or copying the grid cell by cell, and the cost of a
+    move grows with the length of the pushed line rather than the board area.
+    The bitboard also keeps a Zobrist hash of the marbles that is updated as the
+    marbles shift, so positions can be compared with a single integer compare,
+    and the number of marbles of each color, updated as marbles are pushed off.
+    """
+    __slots__ = ("_bits", "_counts", "_hash", "_geometry")
+
+    def __init__(self, board=None, rows=ROWS, cols=COLS):
+        """
+        Initializing the bitboards for white, black and red marbles of an empty
+        board of rows by cols cells, 7 x 7 by default.
+        It takes an optional board parameter given as a list of rows of
+        "W", "B", "R" and "X" strings and sets the bitboards and size from it.
+        """
+        self._geometry = get_geometry(rows, cols)
+        self._bits = [0, 0, 0]
+        self._counts = [0, 0, 0]
+        self._hash = 0
+        if board is not None:
+            self.set_board(board)
+
+    def get_board(self):
+        """Returns the board as a list of rows of "W", "B", "R" and "X" strings"""
+        white, black, red = self._bits
+        rows, cols = self._geometry.rows, self._geometry.cols
+        board = []
+        for row in range(rows):
+            cells = []
+            for column in range(cols):
+                bit = 1 << (row * cols + column)
+                if white & bit:
+                    cells.append("W")
+                elif black & bit:
+                    cells.append("B")
+                elif red & bit:
+                    cells.append("R")
+                else:
+                    cells.append("X")
+            board.append(cells)
+        return board
+
+    def set_board(self, board):
+        """
+        Takes a board parameter as a list of rows and sets the bitboards from it.
+        The size of the bitboard changes to the size of the board given.
+        """
+        geometry = self._geometry
+        if len(board) != geometry.rows or len(board[0]) != geometry.cols:
+            geometry = get_geometry(len(board), len(board[0]))
+        cols = geometry.cols
+        bits = [0, 0, 0]
+        for row, cells in enumerate(board):
+            if len(cells) != cols:
+                raise ValueError("every row of the board must have %d cells" % cols)
+            for column, item in enumerate(cells):
+                if item in COLORS:
+                    bits[COLORS.index(item)] |= 1 << (row * cols + column)
+        self._geometry = geometry
+        self._bits = bits
+        self._counts = [popcount(board) for board in bits]
+        self._hash = _hash_bits(bits, geometry.zobrist)
+
+    def get_state(self):
+        """Returns the bitboards as a (white, black, red) tuple of integers"""
+        return tuple(self._bits)
+
+    def set_state(self, state):
+        """Takes a (white, black, red) tuple of integers and sets the bitboards"""
+        self._bits = list(state)
+        self._counts = [popcount(board) for board in self._bits]
+        self._hash = _hash_bits(self._bits, self._geometry.zobrist)
+
+    def get_size(self):
+        """Returns the size of the board as (rows, columns)"""
+        return (self._geometry.rows, self._geometry.cols)
+
+    def get_hash(self):
+        """Returns the Zobrist hash of the marbles on the board"""
+        return self._hash
+
+    def get_board_item(self, coordinates):
+        """Takes a coordinate parameter and returns the marble in given location"""
+        row, column = coordinates
+        bit = 1 << (row * self._geometry.cols + column)
+        white, black, red = self._bits
+        if white & bit:
+            return "W"
+        if black & bit:
+            return "B"
+        if red & bit:
+            return "R"
+        return "X"
+
+    def get_marble_count(self):
+        """Returns marble counts in order of (White, Black, Red)"""
+        counts = self._counts
+        return (counts[0], counts[1], counts[2])
+
+    def get_color_count(self, color):
+        """Takes a marble color and returns the number of marbles of that color on the board"""
+        return self._counts[COLORS.index(color)]
+
+    def preview_push(self, coordinates, direction):
+        """
+        Takes coordinates and direction and returns (line, captured) for the push
+        without making it, where line is the mask of the marbles that would move
+        and captured is the marble that would be pushed off, or "X" if none.
+        It does not check if the push is legal.
+        """
+        geometry = self._geometry
+        behind, ray, edge = geometry.tables[direction][coordinates[0] * geometry.cols + coordinates[1]]
+        bits = self._bits
+        empty = ray & ~(bits[0] | bits[1] | bits[2])
+        if empty:
+            return (_push_line(direction, ray, empty), "X")
+        for index in range(3):
+            if bits[index] & edge:
+                return (ray ^ edge, COLORS[index])
+        return (ray ^ edge, "X")
+
+    def is_blocked(self, coordinates, direction):
+        """
+        Takes coordinates and direction and returns True if the cell behind the
+        marble is occupied, so the marble cannot be pushed in direction.
+        """
+        geometry = self._geometry
+        behind = geometry.tables[direction][coordinates[0] * geometry.cols + coordinates[1]][0]
+        bits = self._bits
+        return bool((bits[0] | bits[1] | bits[2]) & behind)
+
+    def push(self, coordinates, direction, color):
+        """
+        Takes coordinates, direction and the color of the player pushing, and
+        pushes the line of marbles starting at coordinates one cell in direction.
+        Returns an undo record (coordinates, direction, line, captured) where line
+        is the mask of the marbles that moved and captured is the marble pushed
+        off the board ("W", "B" or "R"), or "X" if no marble was pushed off.
+        Returns None and leaves the board unchanged if the cell behind the marble
+        is occupied or the push would remove the player's own marble.
+        """
+        row, column = coordinates
+        geometry = self._geometry
+        behind, ray, edge = geometry.tables[direction][row * geometry.cols + column]
+        bits = self._bits
+        occupied = bits[0] | bits[1] | bits[2]
+        if occupied & behind:
+            return None
+
+        # the pushed line ends at the first empty cell, or falls off the edge
+        empty = ray & ~occupied
+        captured = "X"
+        if empty:
+            line = _push_line(direction, ray, empty)
+        else:
+            line = ray ^ edge
+            for index in range(3):
+                if bits[index] & edge:
+                    captured = COLORS[index]
+                    if captured == color:
+                        return None
+                    bits[index] ^= edge
+                    self._counts[index] -= 1
+                    self._hash ^= geometry.zobrist[index][edge.bit_length() - 1]
+                    break
+
+        shift = geometry.shifts[direction]
+        toward_low = _TOWARD_LOW[direction]
+        move_keys = geometry.move_keys[direction]
+        for index in range(3):
+            moved = bits[index] & line
+            if moved:
+                self._hash ^= _line_hash(move_keys[index], moved)
+                if toward_low:
+                    bits[index] = (bits[index] ^ moved) | (moved >> shift)
+                else:
+                    bits[index] = (bits[index] ^ moved) | (moved << shift)
+        return (coordinates, direction, line, captured)
+
+    def undo_push(self, record):
+        """
+        Takes an undo record returned by push and moves the pushed line back,
+        putting a captured marble back on its edge cell. Records must be undone
+        in the reverse order of the pushes that made them.
+        """
+        coordinates, direction, line, captured = record
+        row, column = coordinates
+        geometry = self._geometry
+        edge = geometry.tables[direction][row * geometry.cols + column][2]
+        shift = geometry.shifts[direction]
+        toward_low = _TOWARD_LOW[direction]
+        bits = self._bits
+        if toward_low:
+            target = line >> shift
+        else:
+            target = line << shift
+        move_keys = geometry.move_keys[direction]
+        for index in range(3):
+            moved = bits[index] & target
+            if moved:
+                if toward_low:
+                    origin = moved << shift
+                else:
+                    origin = moved >> shift
+                self._hash ^= _line_hash(move_keys[index], origin)
+                bits[index] = (bits[index] ^ moved) | origin
+        if captured != "X":
+            index = COLORS.index(captured)
+            bits[index] |= edge
+            self._counts[index] += 1
+            self._hash ^= geometry.zobrist[index][edge.bit_length() - 1]
+
+    def get_push_changes(self, record):
+        """
+        Takes the undo record of the push just made and returns a list of
+        [row, column, marble] for every cell the push changed, in row order,
+        where marble is the marble now in the cell or "X" if it is empty.
+        Only the cells of the pushed line and the cells it moved into are
+        looked at, so the cost grows with the length of the line.
+        """
+        coordinates, direction, line, captured = record
+        geometry = self._geometry
+        cols = geometry.cols
+        shift = geometry.shifts[direction]
+        toward_low = _TOWARD_LOW[direction]
+        if toward_low:
+            target = line >> shift
+        else:
+            target = line << shift
+        bits = self._bits
+        changes = []
+        cells = line | target
+        while cells:
+            bit = cells & -cells
+            cells ^= bit
+            # a cell of the line held the marble that is now one cell further,
+            # the cell the line moved into held nothing or the captured marble
+            if bit & line:
+                before = bit >> shift if toward_low else bit << shift
+                before = _bit_item(bits, before)
+            else:
+                before = captured
+            after = _bit_item(bits, bit)
+            if before != after:
+                changes.append(list(divmod(bit.bit_length() - 1, cols)) + [after])
+        return changes
+
+    def legal_pushes(self, color, ko_hash=None):
+        """
+        Takes the color of the player to move and an optional ko hash, and
+        returns a list of (coordinates, direction) for every push the player can
+        make. A push is left out when the cell behind the marble is occupied,
+        when it would push off the player's own marble, or when the marbles
+        after the push would hash to ko_hash. The board is not changed.
+        """
+        bits = self._bits
+        geometry = self._geometry
+        tables = geometry.tables
+        cols = geometry.cols
+        own_index = COLORS.index(color)
+        own = bits[own_index]
+        occupied = bits[0] | bits[1] | bits[2]
+        pushes = []
+        while own:
+            low = own & -own
+            own ^= low
+            cell = low.bit_length() - 1
+            coordinates = divmod(cell, cols)
+            for direction in DIRECTIONS:
+                behind, ray, edge = tables[direction][cell]
+                if occupied & behind:
+                    continue
+                empty = ray & ~occupied
+                if not empty:
+                    # a push off the edge removes a marble, so it can never
+                    # repeat an earlier position and ko does not apply
+                    if bits[own_index] & edge:
+                        continue
+                elif ko_hash is not None:
+                    line = _push_line(direction, ray, empty)
+                    move_keys = geometry.move_keys[direction]
+                    key = self._hash
+                    for index in range(3):
+                        moved = bits[index] & line
+                        if moved:
+                            key ^= _line_hash(move_keys[index], moved)
+                    if key == ko_hash:
+                        continue
+                pushes.append((coordinates, direction))
+        return pushes
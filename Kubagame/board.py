@@ -1,6 +1,36 @@
-import pygame
+from .bitboard import BitBoard
+
+
+def standard_layout(size=7):
+    """
+    Takes an odd board size of at least 5 and returns the starting layout of a
+    size x size board as a list of rows of "W", "B", "R" and "X" strings.
+    Each player starts with square blocks of marbles in two opposite corners,
+    white top left and bottom right and black top right and bottom left, and
+    the red marbles fill a diamond in the center, as on the standard 7 x 7 board.
+    """
+    if size < 5 or size % 2 == 0:
+        raise ValueError("board size must be an odd number of at least 5")
+    block = (size - 1) // 3
+    center = size // 2
+    radius = (size - 3) // 2
+    layout = []
+    for row in range(size):
+        cells = []
+        for column in range(size):
+            top, left = row < block, column < block
+            bottom, right = row >= size - block, column >= size - block
+            if (top and left) or (bottom and right):
+                cells.append("W")
+            elif (top and right) or (bottom and left):
+                cells.append("B")
+            elif abs(row - center) + abs(column - center) <= radius:
+                cells.append("R")
+            else:
+                cells.append("X")
+        layout.append(cells)
+    return layout
 
-from .constants import WHITE, GREY, ROWS, COLS, LINE_WIDTH
 
 class Board:
     """
@@ -8,71 +38,56 @@ class Board:
     The board class initializes the game board with the starting conditions.
     It will record all the moves made on the board for the KubaGame class
     to access this record to determine game states.
-    It will also record the previous game board state after a move for
-    comparison.
+    It will also record the hashes of the previous game board states after a
+    move for comparison.
     """
-    def __init__(self):
+    __slots__ = ("_bitboard", "_before_previous", "_previous")
+
+    def __init__(self, layout=None):
         """
-        Setting up the initial state of the board using a list.
-        It initializes the previous state of the board as None and
-        it will update as a move is made.
+        Setting up the initial state of the board from a layout given as a list
+        of rows, by default the standard 7 x 7 layout, stored as one bitboard per
+        marble color. It initializes the previous state of the board as None
+        and it will update as a move is made.
         """
-        self._board = [["W", "W", "X", "X", "X", "B", "B"],
-                      ["W", "W", "X", "R", "X", "B", "B"],
-                      ["X", "X", "R", "R", "R", "X", "X"],
-                      ["X", "R", "R", "R", "R", "R", "X"],
-                      ["X", "X", "R", "R", "R", "X", "X"],
-                      ["B", "B", "X", "R", "X", "W", "W"],
-                      ["B", "B", "X", "X", "X", "W", "W"]]
+        if layout is None:
+            layout = standard_layout()
+        self._bitboard = BitBoard(layout)
         self._before_previous = None
         self._previous = None
 
-    def draw_grid(self, win):
-        """Draw out the gameboard grid"""
-        win.fill(WHITE)
-        for row in range(ROWS):
-            pygame.draw.line(win, GREY, (row * 100, 0), (row * 100, ROWS * 100), LINE_WIDTH)
-        for col in range(COLS + 1):
-            pygame.draw.line(win, GREY, (0, col * 100), (COLS * 100, col * 100), LINE_WIDTH)
-
-    def draw_pieces(self):
-        """Draw game pieces"""
+    def get_bitboard(self):
+        """Returns the bitboard representation of the game board"""
+        return self._bitboard
 
-        display_board = self.get_board()
-        for row in display_board:
-            for index, piece in enumerate(row):
-                if piece == "W":
-                    row[index] = white
-                if piece == "R":
-                    row[index] = red
-                if piece == "B":
-                    row[index] = black
+    def get_size(self):
+        """Returns the size of the game board as (rows, columns)"""
+        return self._bitboard.get_size()
 
     def get_board(self):
-        """Returns the game board"""
-        return self._board
+        """Returns the game board as a list of rows"""
+        return self._bitboard.get_board()
 
     def set_board(self, board):
         """Set the game board after a move has been made"""
-        self._board = board
+        self._bitboard.set_board(board)
 
     def get_previous(self):
-        """Returns the previous state of the game board"""
+        """Returns the hash of the board before the last move"""
         return self._previous
 
     def set_previous(self, board):
-        """Takes a board parameter and sets the previous state of the board"""
+        """Takes a board hash parameter and sets the previous state of the board"""
         self._previous = board
 
     def get_before_previous(self):
-        """Returns the previous state of the game board"""
+        """Returns the hash of the board before the move before the last move"""
         return self._before_previous
 
     def set_before_previous(self, board):
-        """Takes a board parameter and sets the previous state of the board"""
+        """Takes a board hash parameter and sets the state before the previous state of the board"""
         self._before_previous = board
 
     def get_board_item(self, coordinates):
         """Takes a coordinate paramater and return item in given location"""
-        row, column = coordinates
-        return self._board[row][column]
\ No newline at end of file
+        return self._bitboard.get_board_item(coordinates)
\ No newline at end of file
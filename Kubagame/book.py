@@ -0,0 +1,182 @@
+import argparse
+import struct
+import sys
+
+from .bitboard import ZOBRIST_TURN, encode_move, decode_move
+from .game import KubaGame
+from .record import read_games
+
+# file header: magic, version and number of entries
+MAGIC = b"KBOK"
+VERSION = 1
+_HEADER = struct.Struct("<4sB3xI")
+
+# one entry per book move: book key, move code, games played and points
+# scored by the player to move, counted in half points so draws stay whole
+_ENTRY = struct.Struct("<QBII")
+
+
+def book_key(game, playername):
+    """
+    Takes a game and the name of the player to move and returns the key of the
+    position in the opening book. Before the first move either player may
+    move, so the mover's color is folded into the key then.
+    """
+    key = game.position_key()
+    if game.get_current_turn() is None:
+        key ^= ZOBRIST_TURN[game.get_color(playername)]
+    return key
+
+
+class OpeningBook:
+    """
+    Opening book for the KubaGame.
+    It maps the book key of each position to the moves played from it, with
+    the number of games each move was played in and the points the player to
+    move scored with it (1 for a win, 0.5 for a game that was not won). The
+    computer players look positions up before they search, so the opening
+    moves that every game starts with cost a dictionary lookup.
+    """
+    def __init__(self, min_games=4):
+        """
+        Initializing an empty book with the number of games a move needs
+        before probe will play it.
+        """
+        self._min_games = min_games
+        self._positions = {}
+
+    def get_position_count(self):
+        """Returns the number of positions in the book"""
+        return len(self._positions)
+
+    def get_moves(self, key):
+        """
+        Takes a book key and returns a dict of {(coordinates, direction): (games,
+        score)} for the moves played from the position.
+        """
+        moves = {}
+        for code, (games, points) in self._positions.get(key, {}).items():
+            moves[decode_move(code)] = (games, points / 2)
+        return moves
+
+    def add(self, key, move, points):
+        """
+        Takes a book key, a move as (coordinates, direction) and the half points
+        (0, 1 or 2) the player to move scored in the game, and adds the game to
+        the move's statistics.
+        """
+        moves = self._positions.setdefault(key, {})
+        code = encode_move(move[0], move[1])
+        games, total = moves.get(code, (0, 0))
+        moves[code] = (games + 1, total + points)
+
+    def add_record(self, record, max_plies=12):
+        """
+        Takes a GameRecord and adds its first max_plies moves to the book,
+        scored by the game's result for the player who made each move.
+        """
+        players = record.get_players()
+        names = (players[0][0], players[1][0])
+        winner = record.get_winner()
+        game = KubaGame(players[0], players[1])
+        turn = record.get_first_player()
+        for code in record.get_move_codes()[:max_plies]:
+            coordinates, direction = decode_move(code)
+            if winner is None:
+                points = 1
+            elif winner == turn:
+                points = 2
+            else:
+                points = 0
+            self.add(book_key(game, names[turn]), (coordinates, direction), points)
+            if game.apply_move(names[turn], coordinates, direction) is None:
+                raise ValueError("move %r %r of %s is not valid" % (coordinates, direction, names[turn]))
+            turn = 1 - turn
+
+    def probe(self, game, playername):
+        """
+        Takes a game and the name of the player to move and returns the book
+        move with the best average score among legal moves played in at least
+        min_games games, preferring the more played move on ties.
+        Returns None if the position has no such move.
+        """
+        moves = self._positions.get(book_key(game, playername))
+        if not moves:
+            return None
+        legal = game.legal_moves(playername)
+        best = None
+        best_rank = None
+        for code, (games, points) in moves.items():
+            if games < self._min_games:
+                continue
+            move = decode_move(code)
+            if move not in legal:
+                continue
+            rank = (points / games, games)
+            if best_rank is None or rank > best_rank:
+                best = move
+                best_rank = rank
+        return best
+
+    def save(self, path):
+        """Writes the book to a compact binary file at path"""
+        entries = []
+        for key in sorted(self._positions):
+            for code, (games, points) in sorted(self._positions[key].items()):
+                entries.append(_ENTRY.pack(key, code, games, points))
+        with open(path, "wb") as book:
+            book.write(_HEADER.pack(MAGIC, VERSION, len(entries)))
+            book.write(b"".join(entries))
+
+    @classmethod
+    def load(cls, path, min_games=4):
+        """Takes the path of a book file written by save and returns the book"""
+        with open(path, "rb") as book:
+            data = book.read()
+        magic, version, count = _HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise ValueError("not a KubaGame opening book")
+        if version != VERSION:
+            raise ValueError("unsupported opening book version %d" % version)
+        opening_book = cls(min_games)
+        positions = opening_book._positions
+        for key, code, games, points in _ENTRY.iter_unpack(data[_HEADER.size:_HEADER.size + count * _ENTRY.size]):
+            positions.setdefault(key, {})[code] = (games, points)
+        return opening_book
+
+
+def build_book(streams, max_plies=12, min_games=4):
+    """
+    Takes an iterable of binary game-record file objects and returns an
+    OpeningBook of the first max_plies moves of every game in them.
+    """
+    opening_book = OpeningBook(min_games)
+    for stream in streams:
+        for record in read_games(stream):
+            opening_book.add_record(record, max_plies)
+    return opening_book
+
+
+def _open_records(paths):
+    """Takes a list of file paths and yields each file opened for binary reading, closing it after"""
+    for path in paths:
+        with open(path, "rb") as stream:
+            yield stream
+
+
+def main(argv=None):
+    """Command-line entry point, run with python -m Kubagame.book"""
+    parser = argparse.ArgumentParser(description="Build a KubaGame opening book from game-record files.")
+    parser.add_argument("records", nargs="+", help="game-record files to read")
+    parser.add_argument("--output", required=True, help="book file to write")
+    parser.add_argument("--plies", type=int, default=12, help="moves of each game to add")
+    parser.add_argument("--min-games", type=int, default=4, help="games a move needs before it is played")
+    args = parser.parse_args(argv)
+    opening_book = build_book(_open_records(args.records), args.plies, args.min_games)
+    opening_book.save(args.output)
+    print("%d positions written to %s" % (opening_book.get_position_count(), args.output))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,3 @@
-import pygame
-
 WIDTH, HEIGHT = 700, 900
 ROWS, COLS = 7, 7
 SQUARE_SIZE = WIDTH//COLS
@@ -11,6 +9,7 @@ WHITE = (255,255,255)
 BLACK = (0,0,0)
 GREY = (128,128,128)
 
-RED_P = pygame.image.load('red.png').convert_alpha()
-WHITE_P = pygame.image.load('white.png').convert_alpha()
-BLACK_P = pygame.image.load('black.png').convert_alpha()
\ No newline at end of file
+# image files of the marbles, loaded by the sprite cache in piece.py
+RED_P = 'red.png'
+WHITE_P = 'white.png'
+BLACK_P = 'black.png'
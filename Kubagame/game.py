@@ -1,7 +1,8 @@
-import pygame
-from .board import Board
+import time
+
+from .board import Board, standard_layout
 from .player import Player
-import copy
+from .bitboard import DIRECTIONS, ZOBRIST_CAPTURED, ZOBRIST_TURN
 
 class KubaGame:
     """
@@ -12,17 +13,26 @@ class KubaGame:
     It will need to interact with the Board class to identify conditions of the board and
     to check if the player's move is legal. The KubaGame class will also initiates the Player
     class and creates two Player objects to store each player's information.
+    The game keeps its state in __slots__ and the board as bitboards, so a
+    parked game holds well under a kilobyte.
     """
-    def __init__(self, player1, player2):
+    __slots__ = ("_players", "_current_turn", "_winner", "_game_board", "_metrics")
+
+    def __init__(self, player1, player2, size=7, layout=None):
         """
         Initializing the game with players, turn and game state.
         It takes player1 and player2 parameters and use them to create Player objects.
+        It takes an optional odd board size for the standard layout of a
+        size x size board, or a starting layout given as a list of rows.
         It initializes the current turn as None and winner as none.
         """
-        self._players = [Player(player1), Player(player2)]
+        if layout is None:
+            layout = standard_layout(size)
+        self._players = (Player(player1), Player(player2))
         self._current_turn = None
         self._winner = None
-        self._game_board = Board()
+        self._game_board = Board(layout)
+        self._metrics = None
 
     def get_current_turn(self):
         """
@@ -34,268 +44,293 @@ class KubaGame:
         else:
             return self._current_turn.get_name()
 
+    def _get_player(self, playername):
+        """Takes player's name and returns the Player object, or None if there is no player with the name"""
+        first, second = self._players
+        if first.get_name() == playername:
+            return first
+        if second.get_name() == playername:
+            return second
+        return None
+
+    def _get_other(self, player):
+        """Takes a Player object of the game and returns the other player's Player object"""
+        if player is self._players[0]:
+            return self._players[1]
+        return self._players[0]
+
+    def get_players(self):
+        """Returns the names of the two players in the order they were given"""
+        return (self._players[0].get_name(), self._players[1].get_name())
+
     def set_current_turn(self, player):
         """Takes a player parameter and set the player whose turn it is to play the game"""
         self._current_turn = player
 
+    def get_metrics(self):
+        """Returns the MoveMetrics the game records its moves in, or None if it records nothing"""
+        return self._metrics
+
+    def set_metrics(self, metrics):
+        """
+        Takes a MoveMetrics to record the counts, reject reasons and phase
+        timings of every move made with make_move or apply_move, or None to
+        stop recording.
+        """
+        self._metrics = metrics
+
     def make_move(self, playername, coordinates, direction):
         """
         Takes playername, coordinates and direction for the player to make a move.
         It checks if a move is valid, make the move if it is valid.
         The method returns True if the move is valid, False if invalid.
         """
+        return self.apply_move(playername, coordinates, direction) is not None
 
-        # Get player object and color
-        playercolor = None
-        current_player = None
-        for player in self._players:
-            if player.get_name() == playername:
-                current_player = player
-                playercolor = player.get_color()
+    def apply_move(self, playername, coordinates, direction):
+        """
+        Takes playername, coordinates and direction and makes the move in place
+        if it is valid, the same way as make_move.
+        Returns an undo record holding the pushed line, the captured marble, the
+        player whose capture count changed and the turn, winner and board history
+        before the move. Returns None if the move is invalid, leaving the game
+        unchanged.
+        """
+        if self._metrics is not None:
+            return self._apply_move_measured(playername, coordinates, direction)
 
+        current_player = self._get_player(playername)
+        if self._reject_reason(current_player, playername, coordinates, direction) is not None:
+            return None
+
+        # push the line of marbles, the bitboard rejects a push when the cell
+        # behind the marble is occupied or when it would push off own marble
+        bitboard = self._game_board.get_bitboard()
+        current_hash = bitboard.get_hash()
+        push = bitboard.push(coordinates, direction, current_player.get_color())
+        if push is None:
+            return None
+        if self._check_ko(push):
+            return None
+
+        record = self._record_history(push, current_player, current_hash)
+        # only the captured marble can change a count, so only it needs checking
+        captured = push[3]
+        if captured != "X":
+            self._record_capture(current_player, captured)
+            self._check_winner(current_player, captured)
+        return record
+
+    def _reject_reason(self, current_player, playername, coordinates, direction):
+        """
+        Takes the Player object of playername, or None if there is no player with
+        the name, and the coordinates and direction of a move, and returns the
+        reason make_move rejects the move before pushing, one of REJECT_REASONS
+        in metrics, or None if the push can be tried.
+        """
         # check if it is player's turn
-        current_turn = self.get_current_turn()
-        if self.get_current_turn() is not None:
-            if current_turn != playername:
-                return False
+        if self._current_turn is not None and self._current_turn.get_name() != playername:
+            return "wrong_turn"
+
+        # check if coordinates provided is within the board
+        rows, columns = self._game_board.get_bitboard().get_size()
+        row, column = coordinates
+        if row not in range(rows) or column not in range(columns):
+            return "out_of_range"
 
         # check if the coordinates given contains player's marble
-        if playercolor != self._game_board.get_board_item(coordinates):
-            return False
+        if current_player is None:
+            return "unknown_player"
+        if current_player.get_color() != self._game_board.get_board_item(coordinates):
+            return "wrong_color"
 
         # check if the game has been won
         if self._winner is not None:
-            return False
+            return "game_over"
 
         # check valid direction entry
-        direction_check = ["L", "R", "F", "B"]
-        if direction not in direction_check:
-            return False
+        if direction not in DIRECTIONS:
+            return "bad_direction"
+        return None
 
-        # check if coordinates provided is within range of 0-6
-        row, column = coordinates
-        if row not in range(7):
-            return False
-        if column not in range(7):
-            return False
+    def _check_ko(self, push):
+        """
+        Takes the record of the push just made and returns True, taking the push
+        back, if it undoes the move the opponent just made, which is when the
+        position hash is the same as before the opponent's move.
+        """
+        bitboard = self._game_board.get_bitboard()
+        if bitboard.get_hash() == self._game_board.get_previous():
+            bitboard.undo_push(push)
+            return True
+        return False
 
-        # create a board
-        current_board = copy.deepcopy(self._game_board.get_board())
-
-        # saves board into previous state of board
-        self._game_board.set_before_previous(copy.deepcopy(self._game_board.get_previous()))
-        self._game_board.set_previous(copy.deepcopy(current_board))
-
-        # Making a move for direction "L"
-        if direction == "L":
-            # validate direction "L"
-            if column + 1 <= 6:
-                if current_board[row][column + 1] != "X":
-                    return False
-            column_ct = column
-            while column_ct > 0:
-                if current_board[row][column_ct - 1] != "X":
-                    column_ct -= 1
-                else:
-                    difference = column - column_ct
-                    current = column_ct
-                    while difference >= 0:
-                        current_board[row][current - 1] = current_board[row][current]
-                        difference -= 1
-                        current += 1
-                    current_board[row][column] = "X"
-                    break
-            if column_ct == 0:
-                column_ct2 = column
-                current2 = 0
-                if current_board[row][0] == playercolor:
-                    return False
-                elif current_board[row][0] == "R":
-                    current_player.set_red_marbles()
-                    while column_ct2 > 0:
-                        current_board[row][current2] = current_board[row][current2 + 1]
-                        column_ct2 -= 1
-                        current2 += 1
-                    current_board[row][column] = "X"
-                else:
-                    while column_ct2 > 0:
-                        current_board[row][current2] = current_board[row][current2 + 1]
-                        column_ct2 -= 1
-                        current2 += 1
-                    current_board[row][column] = "X"
-
-            # check if move undo a move that opponent just made by checking if the
-            # move is the same as previous board state
-            if current_board == self._game_board.get_before_previous():
-                return False
-            else:
-                for player in self._players:
-                    if player.get_name() != playername:
-                        self.set_current_turn(player)
-                self._game_board.set_board(current_board)
-
-        # Making a move for direction "R"
-        if direction == "R":
-            # validate direction "R"
-            if column - 1 >= 0:
-                if current_board[row][column - 1] != "X":
-                    return False
-            column_ct = column
-            while column_ct < 6:
-                if current_board[row][column_ct + 1] != "X":
-                    column_ct += 1
-                else:
-                    difference = column_ct - column
-                    current = column_ct
-                    while difference >= 0:
-                        current_board[row][current + 1] = current_board[row][current]
-                        difference -= 1
-                        current -= 1
-                    current_board[row][column] = "X"
-                    break
-            if column_ct == 6:
-                column_ct2 = column
-                current2 = 6
-                if current_board[row][6] == playercolor:
-                    return False
-                elif current_board[row][6] == "R":
-                    current_player.set_red_marbles()
-                    while column_ct2 < 6:
-                        current_board[row][current2] = current_board[row][current2 - 1]
-                        column_ct2 += 1
-                        current2 -= 1
-                    current_board[row][column] = "X"
-                else:
-                    while column_ct2 < 6:
-                        current_board[row][current2] = current_board[row][current2 - 1]
-                        column_ct2 += 1
-                        current2 -= 1
-                    current_board[row][column] = "X"
-
-            # check if move undo a move that opponent just made by checking if the
-            # move is the same as previous board state
-            if current_board == self._game_board.get_before_previous():
-                return False
-            else:
-                for player in self._players:
-                    if player.get_name() != playername:
-                        self.set_current_turn(player)
-                self._game_board.set_board(current_board)
-
-        # Making a move for direction "F"
-        if direction == "F":
-            # validate direction "F"
-            if row + 1 <= 6:
-                if current_board[row + 1][column] != "X":
-                    return False
-            row_ct = row
-            while row_ct > 0:
-                if current_board[row_ct - 1][column] != "X":
-                    row_ct -= 1
-                else:
-                    difference = row - row_ct
-                    current = row_ct
-                    while difference >= 0:
-                        current_board[current - 1][column] = current_board[current][column]
-                        difference -= 1
-                        current += 1
-                    current_board[row][column] = "X"
-                    break
-            if row_ct == 0:
-                row_ct2 = row
-                current2 = 0
-                if current_board[0][column] == playercolor:
-                    return False
-                elif current_board[0][column] == "R":
-                    current_player.set_red_marbles()
-                    while row_ct2 > 0:
-                        current_board[current2][column] = current_board[current2 + 1][column]
-                        row_ct2 -= 1
-                        current2 += 1
-                    current_board[row][column] = "X"
-                else:
-                    while row_ct2 > 0:
-                        current_board[current2][column] = current_board[current2 + 1][column]
-                        row_ct2 -= 1
-                        current2 += 1
-                    current_board[row][column] = "X"
-
-            # check if move undo a move that opponent just made by checking if the
-            # move is the same as previous board state
-            if current_board == self._game_board.get_before_previous():
-                return False
-            else:
-                for player in self._players:
-                    if player.get_name() != playername:
-                        self.set_current_turn(player)
-                self._game_board.set_board(current_board)
-
-        # Making a move for direction "B"
-        if direction == "B":
-            # validate direction "B"
-            if row - 1 >= 0:
-                if current_board[row - 1][column] != "X":
-                    return False
-            row_ct = row
-            while row_ct < 6:
-                if current_board[row_ct + 1][column] != "X":
-                    row_ct += 1
-                else:
-                    difference = row_ct - row
-                    current = row_ct
-                    while difference >= 0:
-                        current_board[current + 1][column] = current_board[current][column]
-                        difference -= 1
-                        current -= 1
-                    current_board[row][column] = "X"
-                    break
-            if row_ct == 6:
-                row_ct2 = row
-                current2 = 6
-                if current_board[6][column] == playercolor:
-                    return False
-                elif current_board[6][column] == "R":
-                    current_player.set_red_marbles()
-                    while row_ct2 < 6:
-                        current_board[current2][column] = current_board[current2 - 1][column]
-                        row_ct2 += 1
-                        current2 -= 1
-                    current_board[row][column] = "X"
-                else:
-                    while row_ct2 < 6:
-                        current_board[current2][column] = current_board[current2 - 1][column]
-                        row_ct2 += 1
-                        current2 -= 1
-                    current_board[row][column] = "X"
-
-            # check if move undo a move that opponent just made by checking if the
-            # move is the same as previous board state
-            if current_board == self._game_board.get_before_previous():
-                return False
+    def _record_history(self, push, current_player, current_hash):
+        """
+        Takes the record of the push made, the Player who made it and the hash
+        before it, saves the hash into the board history, passes the turn to the
+        other player and returns the undo record of the move.
+        """
+        record = (push, current_player, self._current_turn, self._winner,
+                  self._game_board.get_before_previous())
+        self._game_board.set_before_previous(self._game_board.get_previous())
+        self._game_board.set_previous(current_hash)
+        self.set_current_turn(self._get_other(current_player))
+        return record
+
+    def _record_capture(self, current_player, captured):
+        """Takes the Player who made a move and the marble it pushed off, and counts a captured red marble"""
+        if captured == "R":
+            current_player.set_red_marbles()
+
+    def _check_winner(self, current_player, captured):
+        """
+        Takes the Player who made a move and the marble it pushed off, and sets
+        the player as the winner if they have captured 7 red marbles or pushed
+        off the last marble of the other player.
+        """
+        if captured == "R":
+            if current_player.get_red_marbles() == 7:
+                self.set_winner(current_player)
+        elif captured != "X" and self._game_board.get_bitboard().get_color_count(captured) == 0:
+            self.set_winner(current_player)
+
+    def _apply_move_measured(self, playername, coordinates, direction):
+        """
+        Makes the move the same way as apply_move, recording the time spent in
+        each phase and why the move was rejected in the game's MoveMetrics.
+        """
+        metrics = self._metrics
+        clock = time.perf_counter_ns
+        start = clock()
+
+        current_player = self._get_player(playername)
+        now = clock()
+        metrics.add_time("lookup", now - start)
+        start = now
+
+        reason = self._reject_reason(current_player, playername, coordinates, direction)
+        now = clock()
+        metrics.add_time("validate", now - start)
+        start = now
+        if reason is not None:
+            metrics.add_reject(reason)
+            return None
+
+        bitboard = self._game_board.get_bitboard()
+        current_hash = bitboard.get_hash()
+        push = bitboard.push(coordinates, direction, current_player.get_color())
+        now = clock()
+        metrics.add_time("push", now - start)
+        start = now
+        if push is None:
+            if bitboard.is_blocked(coordinates, direction):
+                metrics.add_reject("blocked")
             else:
-                for player in self._players:
-                    if player.get_name() != playername:
-                        self.set_current_turn(player)
-                self._game_board.set_board(current_board)
+                metrics.add_reject("self_push_off")
+            return None
 
+        ko = self._check_ko(push)
+        now = clock()
+        metrics.add_time("ko", now - start)
+        start = now
+        if ko:
+            metrics.add_reject("ko")
+            return None
 
-        # Check for winner with 7 red marbles after move
-        for player in self._players:
-            if player.get_red_marbles() == 7:
-                self.set_winner(player)
-
-        # Check for winner with opposing player with 0 marbles
-        white, black, red = self.get_marble_count()
-        if white == 0:
-            for player in self._players:
-                if player.get_color() == "B":
-                    self.set_winner(player)
-        if black == 0:
-            for player in self._players:
-                if player.get_color() == "W":
-                    self.set_winner(player)
+        record = self._record_history(push, current_player, current_hash)
+        now = clock()
+        metrics.add_time("history", now - start)
+        start = now
+
+        captured = push[3]
+        self._record_capture(current_player, captured)
+        now = clock()
+        metrics.add_time("capture", now - start)
+        start = now
+
+        self._check_winner(current_player, captured)
+        metrics.add_time("winner", clock() - start)
+        metrics.add_accept(captured, self._winner is not None)
+        return record
+
+    def legal_moves(self, playername):
+        """
+        Takes player's name and returns a list of (coordinates, direction) for
+        every move the player can make, using the same rules as make_move.
+        Returns an empty list if it is not the player's turn or the game has
+        been won. The game is not changed.
+        """
+        if self._winner is not None:
+            return []
+        if self._current_turn is not None and self._current_turn.get_name() != playername:
+            return []
+        player = self._get_player(playername)
+        if player is None:
+            return []
+        return self._game_board.get_bitboard().legal_pushes(
+            player.get_color(), self._game_board.get_previous())
+
+    def end_if_no_moves(self, playername):
+        """
+        Takes the name of the player whose turn it is and, if the game has not
+        been won and the player has no legal moves, sets the other player as the
+        winner, since a player who has no legal moves available has lost.
+        Returns True if the game was ended, False otherwise.
+        """
+        player = self._get_player(playername)
+        if player is None or self._winner is not None:
+            return False
+        if self._current_turn is not None and self._current_turn is not player:
+            return False
+        if self.legal_moves(playername):
+            return False
+        self.set_winner(self._get_other(player))
         return True
 
+    def undo_move(self, record):
+        """
+        Takes an undo record returned by apply_move and takes the move back,
+        restoring the board, captured count, turn, winner and board history.
+        Moves must be undone in the reverse order they were applied.
+        """
+        push, player, previous_turn, previous_winner, before_previous = record
+        self._game_board.get_bitboard().undo_push(push)
+        self._game_board.set_previous(self._game_board.get_before_previous())
+        self._game_board.set_before_previous(before_previous)
+        if push[3] == "R":
+            player.unset_red_marbles()
+        self._current_turn = previous_turn
+        self._winner = previous_winner
+
+    def position_key(self):
+        """
+        Returns an integer Zobrist key of the current position, combining the
+        marbles on the board, the red marbles captured by each player and the
+        color of the player to move. Equal positions always have equal keys,
+        so the key can be used to index caches of positions.
+        """
+        key = self._game_board.get_bitboard().get_hash()
+        for player in self._players:
+            key ^= ZOBRIST_CAPTURED[player.get_color()][player.get_red_marbles()]
+        if self._current_turn is not None:
+            key ^= ZOBRIST_TURN[self._current_turn.get_color()]
+        return key
+
+    def solve_position(self, tablebase, playername=None):
+        """
+        Takes an endgame Tablebase and the name of the player to move, by default
+        the player whose turn it is, and returns a tuple of the result of the
+        position for that player ("win", "loss" or "draw") and the number of
+        moves to the end of the game with best play.
+        Returns None if the position is not in the tablebase or the game is over.
+        """
+        if playername is None:
+            if self._current_turn is None:
+                return None
+            playername = self._current_turn.get_name()
+        return tablebase.probe_game(self, playername)
+
     def get_winner(self):
         """
         Returns the name of the winning player.
@@ -314,10 +349,27 @@ class KubaGame:
         """
         Takes player's name and return number of red marble captured.
         It will communicate with the Player class object to obtain this information.
+        Returns None if there is no player with the name.
         """
-        for player in self._players:
-            if player.get_name() == playername:
-                return player.get_red_marbles()
+        player = self._get_player(playername)
+        if player is not None:
+            return player.get_red_marbles()
+
+    def get_color(self, playername):
+        """Takes player's name and returns the color of the player's marbles"""
+        player = self._get_player(playername)
+        if player is not None:
+            return player.get_color()
+
+    def get_opponent(self, playername):
+        """Takes player's name and returns the name of the other player"""
+        player = self._get_player(playername)
+        if player is not None:
+            return self._get_other(player).get_name()
+
+    def get_game_board(self):
+        """Returns the Board object of the game"""
+        return self._game_board
 
     def get_marble(self, coordinates):
         """
@@ -330,18 +382,7 @@ class KubaGame:
     def get_marble_count(self):
         """
         Returns marble counts in order of (White, Black, Red).
-        It will check the board condition in Board class to get this information.
+        The counts are kept up to date by the bitboard in Board class as marbles
+        are pushed off.
         """
-        wcount = 0
-        bcount = 0
-        rcount = 0
-        for rows in self._game_board.get_board():
-            for columns in rows:
-                if columns == "W":
-                    wcount += 1
-                elif columns == "B":
-                    bcount += 1
-                elif columns == "R":
-                    rcount += 1
-
-        return (wcount, bcount, rcount)
\ No newline at end of file
+        return self._game_board.get_bitboard().get_marble_count()
\ No newline at end of file
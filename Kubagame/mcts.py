@@ -0,0 +1,223 @@
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# longest random playout before it is scored as a draw
+MAX_PLAYOUT_PLIES = 300
+
+
+class _Node:
+    """Search tree node for the position reached by move, with the statistics of its playouts"""
+    def __init__(self, parent, move, mover, to_move, moves):
+        self.parent = parent
+        self.move = move
+        self.mover = mover
+        self.to_move = to_move
+        self.untried = moves
+        self.children = []
+        self.visits = 0
+        self.wins = 0.0
+
+    def select_child(self, exploration):
+        """Returns the child with the highest UCT value"""
+        log_visits = math.log(self.visits)
+        best = None
+        best_value = -1.0
+        for child in self.children:
+            value = child.wins / child.visits + exploration * math.sqrt(log_visits / child.visits)
+            if value > best_value:
+                best = child
+                best_value = value
+        return best
+
+
+def _choose_playout_move(game, mover, moves, rng, policy):
+    """
+    Takes the legal moves of the player moving in a playout and picks one.
+    The random policy picks uniformly, the light policy picks a move that
+    pushes a marble off the board whenever there is one.
+    """
+    if policy == "light":
+        bitboard = game.get_game_board().get_bitboard()
+        color = game.get_color(mover)
+        captures = []
+        for move in moves:
+            captured = bitboard.preview_push(move[0], move[1])[1]
+            if captured != "X" and captured != color:
+                captures.append(move)
+        if captures:
+            return captures[rng.randrange(len(captures))]
+    return moves[rng.randrange(len(moves))]
+
+
+def _playout(game, mover, other, rng, policy, records):
+    """
+    Plays random moves from the current position until the game is decided,
+    appending the undo records to records.
+    Returns the name of the winner, or None if the playout was cut off.
+    """
+    for _ in range(MAX_PLAYOUT_PLIES):
+        winner = game.get_winner()
+        if winner is not None:
+            return winner
+        moves = game.legal_moves(mover)
+        if not moves:
+            # a player who has no legal moves available has lost the game
+            return other
+        move = _choose_playout_move(game, mover, moves, rng, policy)
+        records.append(game.apply_move(mover, move[0], move[1]))
+        mover, other = other, mover
+    return game.get_winner()
+
+
+def _search_tree(game, playername, iterations, time_limit, policy, exploration, seed):
+    """
+    Builds a search tree for the player to move with up to iterations playouts,
+    stopping early when time_limit seconds have passed.
+    Returns a tuple of the root statistics as {move: (visits, wins)}, the
+    principal variation following the most visited children, and the number
+    of playouts. It is a module function so it can run in a worker process.
+    """
+    rng = random.Random(seed)
+    deadline = None
+    if time_limit is not None:
+        deadline = time.perf_counter() + time_limit
+    opponent = game.get_opponent(playername)
+    root = _Node(None, None, opponent, playername, game.legal_moves(playername))
+
+    playouts = 0
+    while playouts < iterations:
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+        node = root
+        records = []
+
+        # select down the tree while every move of the node has been tried
+        while not node.untried and node.children:
+            node = node.select_child(exploration)
+            records.append(game.apply_move(node.mover, node.move[0], node.move[1]))
+
+        # expand one untried move
+        if node.untried and game.get_winner() is None:
+            move = node.untried.pop(rng.randrange(len(node.untried)))
+            mover = node.to_move
+            to_move = game.get_opponent(mover)
+            records.append(game.apply_move(mover, move[0], move[1]))
+            child = _Node(node, move, mover, to_move, game.legal_moves(to_move))
+            node.children.append(child)
+            node = child
+
+        winner = _playout(game, node.to_move, node.mover, rng, policy, records)
+        for record in reversed(records):
+            game.undo_move(record)
+        playouts += 1
+
+        # back up the result, each node counts wins for the player who moved into it
+        while node is not None:
+            node.visits += 1
+            if winner is None:
+                node.wins += 0.5
+            elif winner == node.mover:
+                node.wins += 1
+            node = node.parent
+
+    stats = {}
+    for child in root.children:
+        stats[child.move] = (child.visits, child.wins)
+    pv = []
+    node = root
+    while node.children:
+        node = max(node.children, key=lambda child: child.visits)
+        pv.append(node.move)
+    return (stats, pv, playouts)
+
+
+class MCTSPlayer:
+    """
+    Monte Carlo Tree Search computer player for the KubaGame.
+    It grows a search tree with UCT selection and scores new nodes by playing
+    the game out with random or light-policy moves. With more than one worker
+    it runs a separate tree in each process of a ProcessPoolExecutor and merges
+    the visit counts of the root moves, so playouts scale with the number of
+    cores. The search makes and takes back moves in place, so the game is
+    unchanged afterwards.
+    """
+    def __init__(self, iterations=1000, time_limit=None, workers=1, policy="random",
+                 exploration=1.4, seed=None, executor=None):
+        """
+        Initializing the player with the number of playouts per move, an optional
+        time budget per move in seconds, the number of worker processes, the
+        playout policy ("random" or "light"), the UCT exploration constant and a
+        random seed. An existing executor can be given to share worker processes
+        between players; otherwise one is created on the first parallel search.
+        """
+        if policy not in ("random", "light"):
+            raise ValueError("policy must be 'random' or 'light'")
+        self._iterations = iterations
+        self._time_limit = time_limit
+        self._workers = workers
+        self._policy = policy
+        self._exploration = exploration
+        self._rng = random.Random(seed)
+        self._executor = executor
+        self._owns_executor = False
+        self._visits = {}
+        self._playouts = 0
+
+    def get_visits(self):
+        """Returns the merged root statistics of the last search as {move: (visits, wins)}"""
+        return self._visits
+
+    def get_playouts(self):
+        """Returns the number of playouts of the last search over all workers"""
+        return self._playouts
+
+    def close(self):
+        """Shuts down the worker processes if the player created them"""
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+            self._owns_executor = False
+
+    def search(self, game, playername):
+        """
+        Takes a game and the name of the player to move and searches for the
+        player's best move, the most visited root move over all trees.
+        Returns a tuple of the best move as (coordinates, direction) and the
+        principal variation, which follows the most visited children of a single
+        tree and is only the best move when several workers are used.
+        Returns (None, []) if the player has no legal moves.
+        """
+        self._visits = {}
+        self._playouts = 0
+        moves = game.legal_moves(playername)
+        if not moves:
+            return (None, [])
+        if len(moves) == 1:
+            return (moves[0], [moves[0]])
+
+        if self._workers <= 1:
+            stats, pv, playouts = _search_tree(game, playername, self._iterations, self._time_limit,
+                                               self._policy, self._exploration, self._rng.getrandbits(64))
+            self._visits = stats
+            self._playouts = playouts
+        else:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self._workers)
+                self._owns_executor = True
+            share = -(-self._iterations // self._workers)
+            futures = [self._executor.submit(_search_tree, game, playername, share, self._time_limit,
+                                             self._policy, self._exploration, self._rng.getrandbits(64))
+                       for _ in range(self._workers)]
+            for future in futures:
+                stats, pv, playouts = future.result()
+                self._playouts += playouts
+                for move, (visits, wins) in stats.items():
+                    merged_visits, merged_wins = self._visits.get(move, (0, 0.0))
+                    self._visits[move] = (merged_visits + visits, merged_wins + wins)
+
+        best = max(self._visits, key=lambda move: self._visits[move][0])
+        if self._workers > 1 or not pv or pv[0] != best:
+            pv = [best]
+        return (best, pv)
@@ -0,0 +1,94 @@
+# phases of a move that are timed, in the order make_move runs them
+PHASES = ("lookup", "validate", "push", "ko", "history", "capture", "winner")
+
+# reasons make_move rejects a move, in the order they are checked
+REJECT_REASONS = ("wrong_turn", "out_of_range", "unknown_player", "wrong_color", "game_over",
+                  "bad_direction", "blocked", "self_push_off", "ko")
+
+
+class MoveMetrics:
+    """
+    Counters and timings of the moves made on a KubaGame, for games that have
+    it set with set_metrics. It counts every move tried, the moves accepted,
+    the moves rejected by reason, the marbles captured and the games won, and
+    times each phase of a move in nanoseconds. A game without metrics set
+    records nothing and pays only for a single check per move. One MoveMetrics
+    can be shared by several games in the same thread.
+    """
+    def __init__(self):
+        """Initializing the metrics with every counter at zero"""
+        self.reset()
+
+    def reset(self):
+        """Sets every counter and timing back to zero"""
+        self._calls = 0
+        self._accepted = 0
+        self._wins = 0
+        self._rejected = dict.fromkeys(REJECT_REASONS, 0)
+        self._captured = {"W": 0, "B": 0, "R": 0}
+        self._phase_counts = dict.fromkeys(PHASES, 0)
+        self._phase_times = dict.fromkeys(PHASES, 0)
+
+    def add_time(self, phase, nanoseconds):
+        """Takes a phase name and the nanoseconds a move spent in it and adds them"""
+        self._phase_counts[phase] += 1
+        self._phase_times[phase] += nanoseconds
+
+    def add_reject(self, reason):
+        """Takes the reason a move was rejected and counts the move"""
+        self._calls += 1
+        self._rejected[reason] += 1
+
+    def add_accept(self, captured, won):
+        """
+        Takes the marble the accepted move captured ("W", "B", "R" or "X" for
+        none) and whether it won the game, and counts the move.
+        """
+        self._calls += 1
+        self._accepted += 1
+        if captured != "X":
+            self._captured[captured] += 1
+        if won:
+            self._wins += 1
+
+    def snapshot(self):
+        """
+        Returns a dict of the counters: the moves tried under "calls", accepted
+        under "accepted", games won under "wins", rejected moves by reason
+        under "rejected", captured marbles by color under "captured" and, for
+        each phase under "phases", its "count" and total "seconds".
+        """
+        phases = {}
+        for phase in PHASES:
+            phases[phase] = {"count": self._phase_counts[phase], "seconds": self._phase_times[phase] / 1e9}
+        return {
+            "calls": self._calls,
+            "accepted": self._accepted,
+            "wins": self._wins,
+            "rejected": dict(self._rejected),
+            "captured": dict(self._captured),
+            "phases": phases,
+        }
+
+    def to_prometheus(self, prefix="kubagame_make_move"):
+        """Returns the counters in the Prometheus text exposition format, with metric names starting with prefix"""
+        lines = []
+
+        def counter(name, help_text, samples):
+            lines.append("# HELP %s_%s %s" % (prefix, name, help_text))
+            lines.append("# TYPE %s_%s counter" % (prefix, name))
+            for labels, value in samples:
+                lines.append("%s_%s%s %s" % (prefix, name, labels, value))
+
+        counter("calls_total", "Moves tried.", [("", self._calls)])
+        counter("accepted_total", "Moves made.", [("", self._accepted)])
+        counter("wins_total", "Moves that won the game.", [("", self._wins)])
+        counter("rejected_total", "Moves rejected, by reason.",
+                [('{reason="%s"}' % reason, count) for reason, count in self._rejected.items()])
+        counter("captured_total", "Marbles pushed off the board, by color.",
+                [('{marble="%s"}' % marble, count) for marble, count in self._captured.items()])
+        counter("phase_total", "Moves that reached each phase.",
+                [('{phase="%s"}' % phase, self._phase_counts[phase]) for phase in PHASES])
+        counter("phase_seconds_total", "Time spent in each phase.",
+                [('{phase="%s"}' % phase, repr(self._phase_times[phase] / 1e9)) for phase in PHASES])
+        return "\n".join(lines) + "\n"
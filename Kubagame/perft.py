@@ -0,0 +1,220 @@
+import argparse
+import copy
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .bitboard import BitBoard, DIRECTIONS
+from .game import KubaGame
+
+
+# (row step, column step) a marble travels when pushed in each direction,
+# kept apart from the bitboard tables so the reference shares nothing with them
+_REFERENCE_STEPS = {"L": (0, -1), "R": (0, 1), "F": (-1, 0), "B": (1, 0)}
+
+
+def reference_push(board, coordinates, direction, color):
+    """
+    Takes a board as a list of rows, the coordinates of a marble, a direction
+    and the color of the player pushing, and pushes the line of marbles one
+    cell in direction by walking the grid cell by cell, as the original
+    list-based make_move did. The board given is not changed.
+    Returns a tuple of the board after the push and the marble pushed off
+    ("W", "B" or "R"), or "X" if none. Returns None if the cell behind the
+    marble is occupied or the push would push off the player's own marble.
+    """
+    rows, columns = len(board), len(board[0])
+    row_step, column_step = _REFERENCE_STEPS[direction]
+    row, column = coordinates
+
+    # check if the cell behind the marble is empty or off the board
+    behind_row, behind_column = row - row_step, column - column_step
+    if 0 <= behind_row < rows and 0 <= behind_column < columns:
+        if board[behind_row][behind_column] != "X":
+            return None
+
+    # walk the line of marbles to the first empty cell or off the edge
+    line = []
+    while 0 <= row < rows and 0 <= column < columns and board[row][column] != "X":
+        line.append((row, column))
+        row += row_step
+        column += column_step
+    captured = "X"
+    if not (0 <= row < rows and 0 <= column < columns):
+        last_row, last_column = line.pop()
+        captured = board[last_row][last_column]
+        if captured == color:
+            return None
+
+    pushed = [list(cells) for cells in board]
+    for line_row, line_column in line:
+        pushed[line_row + row_step][line_column + column_step] = board[line_row][line_column]
+    pushed[coordinates[0]][coordinates[1]] = "X"
+    return (pushed, captured)
+
+
+def _reference_children(game, playername):
+    """
+    Takes a game and the name of the player to move and returns a list of
+    ((coordinates, direction), board, captured) for every move the player can
+    make, with the board after the move and the marble it pushed off, found
+    with reference_push.
+    """
+    if game.get_winner() is not None:
+        return []
+    turn = game.get_current_turn()
+    if turn is not None and turn != playername:
+        return []
+    color = game.get_color(playername)
+    if color is None:
+        return []
+    board = game.get_game_board().get_board()
+    previous = game.get_game_board().get_previous()
+    children = []
+    for row, cells in enumerate(board):
+        for column, marble in enumerate(cells):
+            if marble != color:
+                continue
+            for direction in DIRECTIONS:
+                pushed = reference_push(board, (row, column), direction, color)
+                if pushed is None:
+                    continue
+                # a move cannot undo the opponent's last move; the game keeps the
+                # position before that move only as a hash, so the pushed board
+                # is hashed from scratch to compare with it
+                if previous is not None and BitBoard(pushed[0]).get_hash() == previous:
+                    continue
+                children.append((((row, column), direction), pushed[0], pushed[1]))
+    return children
+
+
+def reference_moves(game, playername):
+    """
+    Takes a game and the name of the player to move and returns the list of
+    (coordinates, direction) the player can make. Every push is found by
+    walking the list board with reference_push and the turn, winner and ko
+    rules of make_move are checked on their own, so it shares no push code
+    with the bitboard and checks legal_moves against the original rules.
+    """
+    return [move for move, board, captured in _reference_children(game, playername)]
+
+
+def _check_reference(game, playername, move, board, captured, reds):
+    """
+    Takes a game right after apply_move made move, the player who made it, the
+    board and captured marble reference_push gave for it and the red marbles
+    the player had captured before, and raises RuntimeError if the board, the
+    captured count or the winner differ from the original rules.
+    """
+    if game.get_game_board().get_board() != board:
+        raise RuntimeError("apply_move %r made a different board than the reference" % (move,))
+    if captured == "R":
+        reds += 1
+    if game.get_captured(playername) != reds:
+        raise RuntimeError("apply_move %r counted %d red marbles instead of %d"
+                           % (move, game.get_captured(playername), reds))
+    opponent = game.get_opponent(playername)
+    opponent_marbles = sum(cells.count(game.get_color(opponent)) for cells in board)
+    winner = None
+    if reds == 7 or opponent_marbles == 0:
+        winner = playername
+    if game.get_winner() != winner:
+        raise RuntimeError("apply_move %r left winner %r instead of %r" % (move, game.get_winner(), winner))
+
+
+def perft(game, playername, depth, reference=False):
+    """
+    Takes a game, the name of the player to move and a depth, and returns the
+    number of leaf positions of the tree of legal moves depth plies deep.
+    A won game or a player without legal moves ends its branch early, and
+    such branches add no leaves. Moves are found with legal_moves, or with
+    reference_moves if reference is True, in which case every move made is
+    also checked against the board, captures and winner of the reference and
+    RuntimeError is raised on a difference. The game is unchanged afterwards.
+    """
+    if depth == 0:
+        return 1
+    if reference:
+        children = _reference_children(game, playername)
+    else:
+        children = [(move, None, None) for move in game.legal_moves(playername)]
+    if depth == 1:
+        return len(children)
+    opponent = game.get_opponent(playername)
+    nodes = 0
+    for move, board, captured in children:
+        reds = game.get_captured(playername)
+        record = game.apply_move(playername, move[0], move[1])
+        if record is None:
+            raise RuntimeError("apply_move rejected %r, a move the reference allows" % (move,))
+        try:
+            if reference:
+                _check_reference(game, playername, move, board, captured, reds)
+            nodes += perft(game, opponent, depth - 1, reference)
+        finally:
+            game.undo_move(record)
+    return nodes
+
+
+def _subtree(task):
+    """Takes a (game, player to move, depth, reference) task and returns its perft count, for a worker process"""
+    game, playername, depth, reference = task
+    return perft(game, playername, depth, reference)
+
+
+def divide(game, playername, depth, reference=False, workers=1):
+    """
+    Takes a game, the name of the player to move, a depth of at least 1, the
+    reference flag of perft and the number of worker processes, and returns a
+    dict of {(coordinates, direction): leaf count} of the subtree below each
+    root move. With more than one worker, each root subtree is counted in a
+    process pool on its own copy of the game.
+    """
+    if reference:
+        moves = reference_moves(game, playername)
+    else:
+        moves = game.legal_moves(playername)
+    opponent = game.get_opponent(playername)
+    tasks = []
+    for coordinates, direction in moves:
+        child = copy.deepcopy(game)
+        child.apply_move(playername, coordinates, direction)
+        tasks.append((child, opponent, depth - 1, reference))
+    if workers <= 1:
+        counts = map(_subtree, tasks)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            counts = list(executor.map(_subtree, tasks))
+    return dict(zip(moves, counts))
+
+
+def main(argv=None):
+    """Command-line entry point, run with python -m Kubagame.perft"""
+    parser = argparse.ArgumentParser(description="Count the leaf positions of the KubaGame move tree.")
+    parser.add_argument("depth", type=int, help="plies to search from the starting position")
+    parser.add_argument("--divide", action="store_true", help="list the count below each root move")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes for the root subtrees")
+    parser.add_argument("--size", type=int, default=7, help="odd board size of the standard layout")
+    parser.add_argument("--reference", action="store_true",
+                        help="find moves by walking the list board instead of legal_moves")
+    args = parser.parse_args(argv)
+    if args.depth < 1 and (args.divide or args.workers > 1):
+        parser.error("--divide and --workers need a depth of at least 1")
+
+    game = KubaGame(("white", "W"), ("black", "B"), args.size)
+    start = time.perf_counter()
+    if args.divide or args.workers > 1:
+        counts = divide(game, "white", args.depth, args.reference, args.workers)
+        if args.divide:
+            for (coordinates, direction), count in counts.items():
+                print("%d%d%s: %d" % (coordinates[0], coordinates[1], direction, count))
+        nodes = sum(counts.values())
+    else:
+        nodes = perft(game, "white", args.depth, args.reference)
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    print("perft(%d) = %d in %.2f s, %.0f nodes/sec" % (args.depth, nodes, elapsed, nodes / elapsed))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,87 @@
+import os
+
 import pygame
 
+from .constants import RED_P, WHITE_P, BLACK_P, SQUARE_SIZE, COLS
+
+# the images are kept next to the package
+IMAGE_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# image file of each marble
+PIECE_IMAGES = {"R": RED_P, "W": WHITE_P, "B": BLACK_P}
+
+
+class SpriteCache:
+    """
+    Loads the marble images once, the first time each is asked for, so they
+    are only loaded after the display is set up. Each image is converted for
+    the display and scaled to the cell size when it is loaded, and only the
+    scaled sprite is kept, so nothing is scaled while drawing.
+    The sprites can be packed into a single atlas surface, after which each
+    sprite is a subsurface of the atlas.
+    """
+    def __init__(self, size=SQUARE_SIZE, directory=IMAGE_DIRECTORY):
+        """Initializing an empty cache of sprites size pixels wide, loaded from directory"""
+        self._size = size
+        self._directory = directory
+        self._sprites = {}
+        self._atlas = None
+
+    def get_size(self):
+        """Returns the width and height of the sprites in pixels"""
+        return self._size
+
+    def get(self, marble):
+        """Takes a marble ("W", "B" or "R") and returns its sprite, loading it the first time"""
+        sprite = self._sprites.get(marble)
+        if sprite is None:
+            image = pygame.image.load(os.path.join(self._directory, PIECE_IMAGES[marble])).convert_alpha()
+            sprite = pygame.transform.smoothscale(image, (self._size, self._size))
+            self._sprites[marble] = sprite
+        return sprite
+
+    def get_sprites(self):
+        """Returns a dict of {marble: sprite} of every marble, loading any not loaded yet"""
+        sprites = {}
+        for marble in PIECE_IMAGES:
+            sprites[marble] = self.get(marble)
+        return sprites
+
+    def get_atlas(self):
+        """Returns the atlas surface, or None if the sprites have not been packed"""
+        return self._atlas
+
+    def build_atlas(self):
+        """
+        Packs every sprite side by side into one atlas surface and replaces the
+        sprites with subsurfaces of it. Returns the atlas.
+        """
+        if self._atlas is None:
+            sprites = self.get_sprites()
+            atlas = pygame.Surface((self._size * len(sprites), self._size), pygame.SRCALPHA).convert_alpha()
+            for index, marble in enumerate(sprites):
+                rect = pygame.Rect(index * self._size, 0, self._size, self._size)
+                atlas.blit(sprites[marble], rect)
+                self._sprites[marble] = atlas.subsurface(rect)
+            self._atlas = atlas
+        return self._atlas
+
+
+# the sprite cache shared by the pieces
+SPRITES = SpriteCache()
+
+
 class Piece:
-    """Loads images of the game pieces"""
-    def __init__(self):
-        self._red = pygame.image.load('red.png').convert_alpha()
-        self._white = pygame.image.load('white.png').convert_alpha()
-        self._black = pygame.image.load('black.png').convert_alpha()
+    """Images of the game pieces, taken from the shared sprite cache"""
+    def __init__(self, sprites=SPRITES):
+        self._sprites = sprites
         self._x = 0
         self._y = 0
 
+    def get_image(self, marble):
+        """Takes a marble ("W", "B" or "R") and returns its image"""
+        return self._sprites.get(marble)
+
     def calc_pos(self):
         """Calculate positions of the pieces"""
-        self._x = SQUARE_SIZE * COLS + SQUARE_SIZE // 2
\ No newline at end of file
+        self._x = SQUARE_SIZE * COLS + SQUARE_SIZE // 2
@@ -1,5 +1,3 @@
-import pygame
-
 class Player:
     """
     Player object for the game.
@@ -7,6 +5,8 @@ class Player:
     It will store player information such as name, color given by the KubaGame class operations.
     It will also store the red marbles count of each player, which will help determine a winner.
     """
+    __slots__ = ("_name", "_color", "_red_marbles")
+
     def __init__(self, player):
         """
         Initializing player data using given player data from KubaGame class and
@@ -29,4 +29,8 @@ class Player:
 
     def set_red_marbles(self):
         """Increment number of red marbles captured"""
-        self._red_marbles += 1
\ No newline at end of file
+        self._red_marbles += 1
+
+    def unset_red_marbles(self):
+        """Decrement number of red marbles captured when a capturing move is undone"""
+        self._red_marbles -= 1
\ No newline at end of file
@@ -0,0 +1,185 @@
+import heapq
+import mmap
+import os
+import struct
+import tempfile
+
+from .game import KubaGame
+from .record import read_games
+
+# file header: magic, version, number of entries and number of games
+MAGIC = b"KPDB"
+VERSION = 1
+_HEADER = struct.Struct("<4sB3xQQ")
+
+# one entry per position reached: position key, game id and ply
+_ENTRY = struct.Struct("<QIH")
+_KEY = struct.Struct("<Q")
+
+# result byte stored per game
+RESULT_CODES = {"W": 0, "B": 1, None: 2}
+
+
+def _write_run(entries, directory):
+    """Sorts a chunk of entries and writes it to a temporary run file, returning its path"""
+    entries.sort()
+    handle, path = tempfile.mkstemp(suffix=".run", dir=directory)
+    with os.fdopen(handle, "wb") as run:
+        pack = _ENTRY.pack
+        run.write(b"".join(pack(*entry) for entry in entries))
+    return path
+
+
+def _read_run(path):
+    """Yields the entries of a run file in order"""
+    with open(path, "rb") as run:
+        while True:
+            data = run.read(_ENTRY.size * 4096)
+            if not data:
+                return
+            yield from _ENTRY.iter_unpack(data)
+
+
+def build_index(streams, path, chunk_entries=1 << 20):
+    """
+    Takes an iterable of binary game-record file objects and the path of the
+    index to write, replays every game and writes a position index of every
+    position the games reached, including the starting position.
+    Game ids count the games in the order they are read, starting at 0.
+    Entries are sorted in chunks of chunk_entries and merged from temporary
+    files, so the archive never has to fit in memory.
+    Returns the number of games indexed.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    runs = []
+    results = bytearray()
+    entries = []
+    try:
+        game_id = 0
+        for stream in streams:
+            for record in read_games(stream):
+                players = record.get_players()
+                entries.append((KubaGame(players[0], players[1]).position_key(), game_id, 0))
+                for ply, game in enumerate(record.replay(KubaGame), 1):
+                    entries.append((game.position_key(), game_id, ply))
+                winner = record.get_winner()
+                if winner is None:
+                    results.append(RESULT_CODES[None])
+                else:
+                    results.append(RESULT_CODES[players[winner][1]])
+                game_id += 1
+                if len(entries) >= chunk_entries:
+                    runs.append(_write_run(entries, directory))
+                    entries = []
+        if entries or not runs:
+            runs.append(_write_run(entries, directory))
+
+        total = sum(os.path.getsize(run) for run in runs) // _ENTRY.size
+        with open(path, "wb") as index:
+            index.write(_HEADER.pack(MAGIC, VERSION, total, game_id))
+            index.write(results)
+            pack = _ENTRY.pack
+            batch = []
+            for entry in heapq.merge(*[_read_run(run) for run in runs]):
+                batch.append(pack(*entry))
+                if len(batch) == 4096:
+                    index.write(b"".join(batch))
+                    batch = []
+            index.write(b"".join(batch))
+    finally:
+        for run in runs:
+            os.remove(run)
+    return game_id
+
+
+class PositionIndex:
+    """
+    Read-only position index written by build_index.
+    The file is opened with mmap and holds the result of every game followed
+    by the (position key, game id, ply) entries sorted by key, so a position is
+    found by binary search without reading the index into memory.
+    """
+    def __init__(self, path):
+        """Initializing the index by opening and memory-mapping the index file at path"""
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self._entries, self._games = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError("not a KubaGame position index")
+        if version != VERSION:
+            self.close()
+            raise ValueError("unsupported position index version %d" % version)
+        self._results = _HEADER.size
+        self._start = _HEADER.size + self._games
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Closes the memory map and the file"""
+        self._map.close()
+        self._file.close()
+
+    def get_entry_count(self):
+        """Returns the number of positions stored in the index"""
+        return self._entries
+
+    def get_game_count(self):
+        """Returns the number of games indexed"""
+        return self._games
+
+    def _first(self, key):
+        """Returns the index of the first entry with a key not less than key"""
+        low = 0
+        high = self._entries
+        unpack_from = _KEY.unpack_from
+        data = self._map
+        start = self._start
+        size = _ENTRY.size
+        while low < high:
+            middle = (low + high) // 2
+            if unpack_from(data, start + middle * size)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def lookup(self, key):
+        """
+        Takes a position key from KubaGame.position_key and returns the list of
+        (game id, ply) where an indexed game reached the position.
+        """
+        occurrences = []
+        data = self._map
+        size = _ENTRY.size
+        offset = self._start + self._first(key) * size
+        end = self._start + self._entries * size
+        while offset < end:
+            entry_key, game_id, ply = _ENTRY.unpack_from(data, offset)
+            if entry_key != key:
+                break
+            occurrences.append((game_id, ply))
+            offset += size
+        return occurrences
+
+    def get_result(self, game_id):
+        """Takes a game id and returns the color of the winner, or None if the game was not won"""
+        code = self._map[self._results + game_id]
+        for color, result in RESULT_CODES.items():
+            if result == code:
+                return color
+
+    def stats(self, key):
+        """
+        Takes a position key and returns a tuple of the number of distinct games
+        that reached the position and were won by white, won by black, and not
+        won.
+        """
+        counts = [0, 0, 0]
+        for game_id in set(game_id for game_id, ply in self.lookup(key)):
+            counts[self._map[self._results + game_id]] += 1
+        return tuple(counts)
@@ -0,0 +1,149 @@
+import struct
+
+from .bitboard import encode_move, decode_move
+
+# every game-record file starts with the magic bytes and a format version
+MAGIC = b"KUBA"
+VERSION = 1
+
+# winner byte of a game that was not won
+_NO_WINNER = 255
+
+_COUNT = struct.Struct("<I")
+
+
+class GameRecord:
+    """
+    Record of one KubaGame: the two players as (name, color) tuples, the index
+    of the player who moved first, the index of the winner and the moves as
+    one byte each, the move code of encode_move. Only moves that were made are
+    recorded, and the players take turns, so the player of each move follows
+    from the first player.
+    """
+    def __init__(self, player1, player2, first_player, winner, move_codes):
+        """
+        Initializing the record with the player tuples, the index (0 or 1) of the
+        player who moved first, the index of the winner or None, and the move
+        codes as bytes.
+        """
+        self._players = (tuple(player1), tuple(player2))
+        self._first_player = first_player
+        self._winner = winner
+        self._move_codes = bytes(move_codes)
+
+    def get_players(self):
+        """Returns the two players as (name, color) tuples"""
+        return self._players
+
+    def get_first_player(self):
+        """Returns the index of the player who moved first"""
+        return self._first_player
+
+    def get_winner(self):
+        """Returns the index of the winning player, or None if the game was not won"""
+        return self._winner
+
+    def get_move_codes(self):
+        """Returns the moves as bytes of move codes"""
+        return self._move_codes
+
+    def get_moves(self):
+        """Returns the moves as a list of (coordinates, direction)"""
+        return [decode_move(code) for code in self._move_codes]
+
+    def replay(self, game_class):
+        """
+        Takes the KubaGame class to replay with and replays the moves on a new
+        game, yielding the game after each move. The same game object is
+        yielded each time, changed in place.
+        Raises ValueError if a recorded move is not valid.
+        """
+        game = game_class(self._players[0], self._players[1])
+        names = (self._players[0][0], self._players[1][0])
+        turn = self._first_player
+        for ply, code in enumerate(self._move_codes):
+            coordinates, direction = decode_move(code)
+            if game.apply_move(names[turn], coordinates, direction) is None:
+                raise ValueError("move %d %r %r of %s is not valid" % (ply, coordinates, direction, names[turn]))
+            turn = 1 - turn
+            yield game
+
+
+class GameRecordWriter:
+    """
+    Writes GameRecords to a binary file object one after another. The file
+    starts with MAGIC and VERSION, and each game is written as the length and
+    UTF-8 bytes of each player's name and their color byte, the first player
+    byte, the winner byte (255 if none), the number of moves as a 32-bit
+    little-endian integer and one byte per move.
+    """
+    def __init__(self, stream):
+        """Initializing the writer with a binary file object and writing the file header"""
+        self._stream = stream
+        stream.write(MAGIC + bytes([VERSION]))
+
+    def write(self, record):
+        """Takes a GameRecord and writes it to the file"""
+        parts = []
+        for name, color in record.get_players():
+            encoded = name.encode("utf-8")
+            if len(encoded) > 255:
+                raise ValueError("player name %r is longer than 255 bytes" % name)
+            parts.append(bytes([len(encoded)]) + encoded + color.encode("ascii"))
+        winner = record.get_winner()
+        if winner is None:
+            winner = _NO_WINNER
+        move_codes = record.get_move_codes()
+        parts.append(bytes([record.get_first_player(), winner]))
+        parts.append(_COUNT.pack(len(move_codes)))
+        parts.append(move_codes)
+        self._stream.write(b"".join(parts))
+
+    def write_game(self, player1, player2, moves, first_player=0, winner=None):
+        """
+        Takes the player tuples, the moves made as a list of (coordinates,
+        direction), the index of the player who moved first and the index of
+        the winner or None, and writes them as one game.
+        """
+        move_codes = bytes(encode_move(coordinates, direction) for coordinates, direction in moves)
+        self.write(GameRecord(player1, player2, first_player, winner, move_codes))
+
+
+def _read_exact(stream, size):
+    """Reads size bytes from the stream, raising ValueError if the file ends first"""
+    data = stream.read(size)
+    if len(data) != size:
+        raise ValueError("game record file is truncated")
+    return data
+
+
+def read_games(stream):
+    """
+    Takes a binary file object written by GameRecordWriter and yields a
+    GameRecord for each game in it, reading one game at a time so the whole
+    file is never held in memory.
+    Raises ValueError if the file is not a game-record file or is truncated.
+    """
+    header = stream.read(len(MAGIC) + 1)
+    if header[:len(MAGIC)] != MAGIC:
+        raise ValueError("not a KubaGame record file")
+    if len(header) != len(MAGIC) + 1:
+        raise ValueError("game record file ends before its version")
+    if header[len(MAGIC)] != VERSION:
+        raise ValueError("unsupported game record version %d" % header[len(MAGIC)])
+    while True:
+        length = stream.read(1)
+        if not length:
+            return
+        players = []
+        for index in range(2):
+            if index:
+                length = _read_exact(stream, 1)
+            name = _read_exact(stream, length[0]).decode("utf-8")
+            color = _read_exact(stream, 1).decode("ascii")
+            players.append((name, color))
+        first_player, winner = _read_exact(stream, 2)
+        if winner == _NO_WINNER:
+            winner = None
+        count = _COUNT.unpack(_read_exact(stream, _COUNT.size))[0]
+        yield GameRecord(players[0], players[1], first_player, winner, _read_exact(stream, count))
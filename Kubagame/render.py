@@ -0,0 +1,120 @@
+import pygame
+
+from .constants import RED, WHITE, BLACK, GREY, ROWS, COLS, SQUARE_SIZE, LINE_WIDTH
+
+# colors of the marbles drawn when no sprites are given
+_MARBLE_COLORS = {"W": WHITE, "B": BLACK, "R": RED}
+
+
+def draw_grid(win, rows=ROWS, cols=COLS, square_size=SQUARE_SIZE):
+    """Draw out the gameboard grid of rows by cols cells, square_size pixels wide each"""
+    win.fill(WHITE)
+    width, height = cols * square_size, rows * square_size
+    # the right and bottom borders are drawn inside the last cells, so they
+    # are not cut off when the board fills the window
+    for col in range(cols + 1):
+        x = min(col * square_size, width - LINE_WIDTH)
+        pygame.draw.line(win, GREY, (x, 0), (x, height), LINE_WIDTH)
+    for row in range(rows + 1):
+        y = min(row * square_size, height - LINE_WIDTH)
+        pygame.draw.line(win, GREY, (0, y), (width, y), LINE_WIDTH)
+
+
+def draw_pieces(win, board, sprites, square_size=SQUARE_SIZE):
+    """Draw game pieces of the board from the {"W", "B", "R": Surface} sprites, square_size pixels per cell"""
+    display_board = board.get_board()
+    rows, cols = board.get_size()
+    for row in range(rows):
+        for column in range(cols):
+            piece = display_board[row][column]
+            if piece != "X":
+                rect = pygame.Rect(column * square_size, row * square_size, square_size, square_size)
+                win.blit(sprites[piece], sprites[piece].get_rect(center=rect.center))
+
+
+class BoardRenderer:
+    """
+    Draws a Board to a window, redrawing only what changed.
+    The grid is drawn once with draw_grid to a cached surface. Each call
+    to draw compares the board with the board it last drew and, for every cell
+    that changed, copies the cell back from the cached grid and draws its
+    marble, returning the rectangles it changed so only those need to be sent
+    to the display with pygame.display.update.
+    """
+    def __init__(self, board, sprites=None, square_size=SQUARE_SIZE):
+        """
+        Initializing the renderer with the Board to draw, an optional dict
+        of {"W", "B", "R": Surface} marble sprites the size of a cell and the
+        width of a cell in pixels. A board larger than 7 x 7 needs a smaller
+        cell, and sprites of that size, to fit the window.
+        Without sprites the marbles are drawn as circles.
+        """
+        self._board = board
+        self._sprites = sprites
+        self._square_size = square_size
+        self._grid = None
+        self._drawn = None
+        self._drawn_state = None
+
+    def get_grid(self, window):
+        """Returns the cached surface of the empty grid, drawing it the first time"""
+        if self._grid is None or self._grid.get_size() != window.get_size():
+            self._grid = pygame.Surface(window.get_size()).convert()
+            rows, cols = self._board.get_size()
+            draw_grid(self._grid, rows, cols, self._square_size)
+        return self._grid
+
+    def invalidate(self):
+        """Makes the next draw redraw the whole window, for example after it was uncovered"""
+        self._drawn = None
+        self._drawn_state = None
+
+    def _cell_rect(self, row, column):
+        """Returns the pygame.Rect of the cell at row and column"""
+        size = self._square_size
+        return pygame.Rect(column * size, row * size, size, size)
+
+    def _draw_marble(self, window, rect, marble):
+        """Draws a marble in the cell rect"""
+        if self._sprites is not None:
+            sprite = self._sprites[marble]
+            window.blit(sprite, sprite.get_rect(center=rect.center))
+            return
+        radius = self._square_size // 2 - 10
+        pygame.draw.circle(window, _MARBLE_COLORS[marble], rect.center, radius)
+        pygame.draw.circle(window, GREY, rect.center, radius, LINE_WIDTH)
+
+    def draw(self, window):
+        """
+        Takes the window surface and draws what changed on the board since the
+        last draw. Returns the list of rectangles that changed, empty if the
+        board is unchanged, or the whole window on the first draw.
+        """
+        state = self._board.get_bitboard().get_state()
+        if state == self._drawn_state:
+            return []
+        board = self._board.get_board()
+        rows, cols = self._board.get_size()
+        grid = self.get_grid(window)
+        if self._drawn is None:
+            window.blit(grid, (0, 0))
+            for row in range(rows):
+                for column in range(cols):
+                    if board[row][column] != "X":
+                        self._draw_marble(window, self._cell_rect(row, column), board[row][column])
+            dirty = [window.get_rect()]
+        else:
+            dirty = []
+            for row in range(rows):
+                for column in range(cols):
+                    marble = board[row][column]
+                    if marble == self._drawn[row][column]:
+                        continue
+                    rect = self._cell_rect(row, column)
+                    window.blit(grid, rect, rect)
+                    if marble != "X":
+                        self._draw_marble(window, rect, marble)
+                    dirty.append(rect)
+        self._drawn = board
+        self._drawn_state = state
+        return dirty
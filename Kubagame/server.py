@@ -0,0 +1,296 @@
+import argparse
+import asyncio
+import json
+import sys
+
+from .game import KubaGame
+
+# longest request line accepted from a client, in bytes
+MAX_LINE = 64 * 1024
+
+# responses and events queued for a client before it is disconnected as too slow
+MAX_QUEUED = 1024
+
+# largest board size a session can be created with
+MAX_SIZE = 25
+
+
+def game_state(game):
+    """
+    Takes a game and returns a dict of its full state: the board as a list of
+    row strings, the player whose turn it is, the winner, the red marbles
+    captured by each player and the marble counts as [W, B, R].
+    """
+    captured = {}
+    for playername in game.get_players():
+        captured[playername] = game.get_captured(playername)
+    return {
+        "board": ["".join(row) for row in game.get_game_board().get_board()],
+        "turn": game.get_current_turn(),
+        "winner": game.get_winner(),
+        "captured": captured,
+        "marbles": list(game.get_marble_count()),
+    }
+
+
+class _Session:
+    """A hosted game, the lock that serializes its moves and the clients following it"""
+    def __init__(self, game):
+        self.game = game
+        self.lock = asyncio.Lock()
+        self.clients = {}
+
+
+class _Client:
+    """
+    A connected client: its stream writer, the queue of lines waiting to be
+    sent to it and, for each session it joined, the player it plays as (None
+    for a spectator).
+    """
+    def __init__(self, writer):
+        self.writer = writer
+        self.queue = asyncio.Queue(MAX_QUEUED)
+        self.sessions = {}
+
+    def send(self, message):
+        """Queues a message for the client, closing the connection if the client has stopped reading"""
+        try:
+            self.queue.put_nowait(json.dumps(message) + "\n")
+        except asyncio.QueueFull:
+            self.writer.close()
+
+
+class GameServer:
+    """
+    Hosts KubaGame sessions keyed by session id for clients connected over TCP
+    or a Unix socket. Clients send one JSON request per line and get one JSON
+    response per line, and every client that joined a session is sent an
+    event with the cells that changed after each move made in it.
+
+    Requests have an "op" and the fields it needs, and may carry an "id" that
+    is copied to the response:
+
+    - {"op": "create", "session": id, "players": [[name, color], [name, color]]}
+      with an optional odd board "size", 7 by default
+    - {"op": "join", "session": id, "player": name} (no player to spectate)
+    - {"op": "move", "session": id, "coordinates": [row, column], "direction": d}
+    - {"op": "state", "session": id}
+    - {"op": "leave", "session": id}
+    - {"op": "close", "session": id}
+
+    A move is made as the player the client joined the session as. Moves in
+    a session are made one at a time, and each client has its own queue of
+    outgoing lines, so a slow client or a busy session never holds up others.
+    """
+    def __init__(self, max_sessions=100000):
+        """Initializing the server with no sessions and the most sessions it will host"""
+        self._max_sessions = max_sessions
+        self._sessions = {}
+
+    def get_session_count(self):
+        """Returns the number of sessions hosted"""
+        return len(self._sessions)
+
+    def get_game(self, session_id):
+        """Takes a session id and returns its KubaGame, or None if there is no such session"""
+        session = self._sessions.get(session_id)
+        if session is not None:
+            return session.game
+
+    async def handle_connection(self, reader, writer):
+        """Serves one client connection until it closes, for asyncio.start_server"""
+        client = _Client(writer)
+        sender = asyncio.ensure_future(self._send_loop(client))
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (asyncio.LimitOverrunError, ValueError):
+                    client.send({"ok": False, "error": "request line too long"})
+                    break
+                except ConnectionError:
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                await self._handle_line(client, line)
+        finally:
+            for session_id in list(client.sessions):
+                session = self._sessions.get(session_id)
+                if session is not None:
+                    session.clients.pop(client, None)
+            if not client.queue.full():
+                client.queue.put_nowait(None)
+            try:
+                await asyncio.wait_for(sender, timeout=5)
+            except (asyncio.TimeoutError, ConnectionError):
+                sender.cancel()
+            writer.close()
+
+    async def _send_loop(self, client):
+        """Writes the client's queued lines to its connection until None is queued"""
+        writer = client.writer
+        while True:
+            line = await client.queue.get()
+            if line is None or writer.is_closing():
+                return
+            writer.write(line.encode("utf-8"))
+            await writer.drain()
+
+    async def _handle_line(self, client, line):
+        """Takes a client and a request line, handles the request and queues the response"""
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request is not a JSON object")
+            request_id = request.get("id")
+            handler = getattr(self, "_op_" + str(request.get("op")), None)
+            if handler is None:
+                raise ValueError("unknown op %r" % request.get("op"))
+            response = await handler(client, request)
+        except KeyError as error:
+            response = {"ok": False, "error": "missing field %s" % error}
+        except (ValueError, TypeError) as error:
+            response = {"ok": False, "error": str(error)}
+        if request_id is not None:
+            response["id"] = request_id
+        client.send(response)
+
+    def _session(self, request):
+        """Takes a request and returns its session, raising ValueError if there is none"""
+        session = self._sessions.get(request["session"])
+        if session is None:
+            raise ValueError("unknown session %r" % request["session"])
+        return session
+
+    async def _op_create(self, client, request):
+        """Creates a new session with a new game between the two players"""
+        session_id = request["session"]
+        if session_id in self._sessions:
+            raise ValueError("session %r already exists" % session_id)
+        if len(self._sessions) >= self._max_sessions:
+            raise ValueError("too many sessions")
+        players = request["players"]
+        if (not isinstance(players, list) or len(players) != 2
+                or not all(isinstance(player, list) and len(player) == 2
+                           and isinstance(player[0], str) and isinstance(player[1], str)
+                           for player in players)):
+            raise ValueError("players must be two [name, color] pairs of strings")
+        if players[0][0] == players[1][0]:
+            raise ValueError("a game needs two players with different names")
+        if sorted(player[1] for player in players) != ["B", "W"]:
+            raise ValueError("the players must play W and B")
+        size = request.get("size", 7)
+        if not isinstance(size, int) or size > MAX_SIZE:
+            raise ValueError("board size must be an odd number from 5 to %d" % MAX_SIZE)
+        game = KubaGame((players[0][0], players[0][1]), (players[1][0], players[1][1]), size)
+        # the response is made first, so a session is only added once it is complete
+        response = {"ok": True, "session": session_id, "state": game_state(game)}
+        self._sessions[session_id] = _Session(game)
+        return response
+
+    async def _op_join(self, client, request):
+        """Adds the client to the session as a player, or as a spectator if no player is given"""
+        session = self._session(request)
+        player = request.get("player")
+        if player is not None and player not in session.game.get_players():
+            raise ValueError("%r is not a player of the session" % player)
+        session.clients[client] = player
+        client.sessions[request["session"]] = player
+        return {"ok": True, "session": request["session"], "player": player, "state": game_state(session.game)}
+
+    async def _op_leave(self, client, request):
+        """Removes the client from the session"""
+        session = self._session(request)
+        session.clients.pop(client, None)
+        client.sessions.pop(request["session"], None)
+        return {"ok": True, "session": request["session"]}
+
+    async def _op_state(self, client, request):
+        """Returns the full state of the session's game"""
+        return {"ok": True, "session": request["session"], "state": game_state(self._session(request).game)}
+
+    async def _op_close(self, client, request):
+        """Ends the session and tells every client in it"""
+        session = self._sessions.pop(request["session"], None)
+        if session is None:
+            raise ValueError("unknown session %r" % request["session"])
+        for other in session.clients:
+            other.sessions.pop(request["session"], None)
+            if other is not client:
+                other.send({"event": "closed", "session": request["session"]})
+        return {"ok": True, "session": request["session"]}
+
+    async def _op_move(self, client, request):
+        """
+        Makes the move as the player the client joined as and sends the cells
+        that changed, the turn, the captures and the winner to every client in
+        the session.
+        """
+        session_id = request["session"]
+        session = self._session(request)
+        player = client.sessions.get(session_id)
+        if player is None:
+            raise ValueError("join the session as a player to move")
+        row, column = request["coordinates"]
+        direction = request["direction"]
+        async with session.lock:
+            game = session.game
+            record = game.apply_move(player, (row, column), direction)
+            if record is None:
+                return {"ok": False, "session": session_id, "error": "invalid move"}
+            # the changed cells come from the pushed line, not a diff of the grid
+            changed = game.get_game_board().get_bitboard().get_push_changes(record[0])
+            event = {
+                "event": "move",
+                "session": session_id,
+                "player": player,
+                "coordinates": [row, column],
+                "direction": direction,
+                "changed": changed,
+                "turn": game.get_current_turn(),
+                "captured": dict((name, game.get_captured(name)) for name in game.get_players()),
+                "winner": game.get_winner(),
+            }
+            for other in session.clients:
+                if other is not client:
+                    other.send(event)
+        response = dict(event)
+        del response["event"]
+        response["ok"] = True
+        return response
+
+
+async def serve(server, host=None, port=None, path=None):
+    """
+    Takes a GameServer and either a host and port to listen on over TCP or the
+    path of a Unix socket, and serves clients until cancelled.
+    """
+    if path is not None:
+        listener = await asyncio.start_unix_server(server.handle_connection, path, limit=MAX_LINE)
+    else:
+        listener = await asyncio.start_server(server.handle_connection, host, port, limit=MAX_LINE)
+    async with listener:
+        await listener.serve_forever()
+
+
+def main(argv=None):
+    """Command-line entry point, run with python -m Kubagame.server"""
+    parser = argparse.ArgumentParser(description="Host KubaGame sessions over newline-delimited JSON.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on over TCP")
+    parser.add_argument("--port", type=int, default=8765, help="TCP port to listen on")
+    parser.add_argument("--unix", help="path of a Unix socket to listen on instead of TCP")
+    parser.add_argument("--max-sessions", type=int, default=100000, help="most sessions hosted at once")
+    args = parser.parse_args(argv)
+    server = GameServer(args.max_sessions)
+    try:
+        asyncio.run(serve(server, args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,314 @@
+import argparse
+import itertools
+import mmap
+import struct
+import sys
+from array import array
+from collections import deque
+
+from .bitboard import BitBoard, COLORS, ROWS, COLS, popcount
+
+# file header: magic, version and the material limits of the table
+MAGIC = b"KTBS"
+VERSION = 1
+_HEADER = struct.Struct("<4sBBBB")
+
+# red marbles a player must capture to win
+RED_TARGET = 7
+
+# results of a position for the player to move
+WIN = "win"
+LOSS = "loss"
+DRAW = "draw"
+
+# a position's byte is 0 for a draw (or an unused index), 1 to 127 for a win
+# in that many plies and 128 plus the plies for a loss
+_MAX_DISTANCE = 127
+_LOSS_FLAG = 128
+
+_CELLS = ROWS * COLS
+_BINOMIAL = [[0] * 8 for _ in range(_CELLS + 1)]
+for _n in range(_CELLS + 1):
+    _BINOMIAL[_n][0] = 1
+    for _k in range(1, 8):
+        _BINOMIAL[_n][_k] = _BINOMIAL[_n - 1][_k - 1] + _BINOMIAL[_n - 1][_k] if _n else 0
+
+
+def _rank(bits):
+    """Takes a bitboard and returns the rank of its set of cells among sets of the same size"""
+    rank = 0
+    count = 1
+    while bits:
+        low = bits & -bits
+        rank += _BINOMIAL[low.bit_length() - 1][count]
+        count += 1
+        bits ^= low
+    return rank
+
+
+class _Layout:
+    """
+    Index layout of a tablebase. Every material (white, black, red marbles on
+    the board) within the limits has a segment, indexed by the rank of each
+    color's cells, the red marbles each player still needs (only up to one
+    more than the reds on the board matters) and the color to move.
+    """
+    def __init__(self, max_white, max_black, max_red):
+        self.limits = (max_white, max_black, max_red)
+        self.segments = {}
+        offset = 0
+        for white in range(1, max_white + 1):
+            for black in range(1, max_black + 1):
+                for red in range(max_red + 1):
+                    size = (_BINOMIAL[_CELLS][white] * _BINOMIAL[_CELLS][black]
+                            * _BINOMIAL[_CELLS][red] * (red + 1) * (red + 1) * 2)
+                    self.segments[(white, black, red)] = offset
+                    offset += size
+        self.size = offset
+
+    def index(self, state, white_needs, black_needs, side):
+        """
+        Takes the (white, black, red) bitboards, the reds white and black still
+        need and the index of the color to move (0 white, 1 black) and returns
+        the position's index, or None if its material is outside the table.
+        """
+        white, black, red = state
+        counts = (popcount(white), popcount(black), popcount(red))
+        offset = self.segments.get(counts)
+        if offset is None:
+            return None
+        reds = counts[2]
+        needs = (min(white_needs, reds + 1) - 1) * (reds + 1) + min(black_needs, reds + 1) - 1
+        index = _rank(white) * _BINOMIAL[_CELLS][counts[1]] + _rank(black)
+        index = index * _BINOMIAL[_CELLS][reds] + _rank(red)
+        return offset + ((index * (reds + 1) * (reds + 1) + needs) * 2 + side)
+
+    def positions(self):
+        """Yields (index, state, white needs, black needs, side) of every position in the table"""
+        cells = range(_CELLS)
+        for (white_count, black_count, red_count) in self.segments:
+            for white_cells in itertools.combinations(cells, white_count):
+                white = sum(1 << cell for cell in white_cells)
+                for black_cells in itertools.combinations(cells, black_count):
+                    black = sum(1 << cell for cell in black_cells)
+                    if white & black:
+                        continue
+                    for red_cells in itertools.combinations(cells, red_count):
+                        red = sum(1 << cell for cell in red_cells)
+                        if red & (white | black):
+                            continue
+                        state = (white, black, red)
+                        for white_needs in range(1, red_count + 2):
+                            for black_needs in range(1, red_count + 2):
+                                for side in (0, 1):
+                                    yield (self.index(state, white_needs, black_needs, side),
+                                           state, white_needs, black_needs, side)
+
+
+def _successors(bitboard, state, white_needs, black_needs, side, layout):
+    """
+    Takes a position and returns None if the player to move has a move that
+    wins at once, by capturing the last opposing marble or the last red
+    marble needed, otherwise the list of the indexes of the positions after
+    each legal move. The ko rule is not applied.
+    """
+    color = COLORS[side]
+    opponent = COLORS[1 - side]
+    bitboard.set_state(state)
+    successors = []
+    for coordinates, direction in bitboard.legal_pushes(color):
+        record = bitboard.push(coordinates, direction, color)
+        captured = record[3]
+        needs = [white_needs, black_needs]
+        if captured == "R":
+            needs[side] -= 1
+        after = bitboard.get_state()
+        bitboard.undo_push(record)
+        if needs[side] == 0:
+            return None
+        if captured == opponent and after[1 - side] == 0:
+            return None
+        successors.append(layout.index(after, needs[0], needs[1], 1 - side))
+    return successors
+
+
+def build_tablebase(path, max_white=1, max_black=1, max_red=1, progress=None):
+    """
+    Takes the path of the tablebase to write and the most white, black and red
+    marbles of its positions, solves every position by retrograde analysis and
+    writes the table. Captures only lower the material, so every position
+    reached from the table is in it or ends the game. Positions that are not
+    won or lost with best play are draws. The ko rule is not part of a position
+    and is not applied. Takes an optional progress callable that is given a
+    message for each stage. Returns the number of positions solved.
+    The size grows quickly with material: (1, 1, 1) is about a million
+    positions, each extra marble multiplies it by up to 49.
+    """
+    layout = _Layout(max_white, max_black, max_red)
+    size = layout.size
+    values = bytearray(size)
+    resolved = bytearray(size)
+    remaining = array("I", [0]) * size
+    starts = array("Q", [0]) * size
+    edges = array("I")
+    queue = deque()
+    wins = []
+    bitboard = BitBoard()
+
+    # forward pass: the successors of every position, and the positions that
+    # are decided at once
+    if progress:
+        progress("generating moves for %d positions" % size)
+    solved = 0
+    for index, state, white_needs, black_needs, side in layout.positions():
+        solved += 1
+        successors = _successors(bitboard, state, white_needs, black_needs, side, layout)
+        if successors is None:
+            resolved[index] = 1
+            values[index] = 1
+            wins.append(index)
+            continue
+        if not successors:
+            # a player who has no legal moves available has lost the game
+            resolved[index] = 1
+            values[index] = _LOSS_FLAG
+            queue.append((index, 0))
+            continue
+        remaining[index] = len(successors)
+        starts[index] = len(edges)
+        edges.extend(successors)
+    queue.extend((index, 1) for index in wins)
+
+    # invert the successor lists into predecessor lists
+    if progress:
+        progress("indexing %d moves" % len(edges))
+    counts = array("Q", [0]) * (size + 1)
+    for successor in edges:
+        counts[successor + 1] += 1
+    for index in range(size):
+        counts[index + 1] += counts[index]
+    fill = array("Q", counts)
+    predecessors = array("I", [0]) * len(edges)
+    for index in range(size):
+        start = starts[index]
+        for edge in range(start, start + remaining[index]):
+            successor = edges[edge]
+            predecessors[fill[successor]] = index
+            fill[successor] += 1
+    del edges, fill
+
+    # backward pass in order of distance: a position is won if a move reaches a
+    # lost position, and lost once every move reaches a won position
+    if progress:
+        progress("solving")
+    while queue:
+        index, distance = queue.popleft()
+        lost = values[index] >= _LOSS_FLAG
+        for edge in range(counts[index], counts[index + 1]):
+            predecessor = predecessors[edge]
+            if resolved[predecessor]:
+                continue
+            if lost:
+                resolved[predecessor] = 1
+                values[predecessor] = min(distance + 1, _MAX_DISTANCE)
+                queue.append((predecessor, distance + 1))
+            else:
+                remaining[predecessor] -= 1
+                if remaining[predecessor] == 0:
+                    resolved[predecessor] = 1
+                    values[predecessor] = _LOSS_FLAG + min(distance + 1, _MAX_DISTANCE)
+                    queue.append((predecessor, distance + 1))
+
+    with open(path, "wb") as table:
+        table.write(_HEADER.pack(MAGIC, VERSION, max_white, max_black, max_red))
+        table.write(values)
+    return solved
+
+
+class Tablebase:
+    """
+    Endgame tablebase written by build_tablebase.
+    The file is opened with mmap and holds one byte per position, found by
+    computing the position's index from its bitboards, so a probe does not
+    search or read the table into memory.
+    """
+    def __init__(self, path):
+        """Initializing the tablebase by opening and memory-mapping the file at path"""
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, max_white, max_black, max_red = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError("not a KubaGame tablebase")
+        if version != VERSION:
+            self.close()
+            raise ValueError("unsupported tablebase version %d" % version)
+        self._layout = _Layout(max_white, max_black, max_red)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Closes the memory map and the file"""
+        self._map.close()
+        self._file.close()
+
+    def get_limits(self):
+        """Returns the most (white, black, red) marbles of the positions in the table"""
+        return self._layout.limits
+
+    def probe(self, state, white_captured, black_captured, color):
+        """
+        Takes the (white, black, red) bitboards, the red marbles captured by the
+        white and black players and the color to move, and returns a tuple of
+        the result for the player to move (WIN, LOSS or DRAW) and the plies to
+        the end of the game with best play (0 for a draw).
+        Returns None if the material is outside the table.
+        """
+        index = self._layout.index(state, RED_TARGET - white_captured, RED_TARGET - black_captured,
+                                   COLORS.index(color))
+        if index is None:
+            return None
+        value = self._map[_HEADER.size + index]
+        if value == 0:
+            return (DRAW, 0)
+        if value >= _LOSS_FLAG:
+            return (LOSS, value - _LOSS_FLAG)
+        return (WIN, value)
+
+    def probe_game(self, game, playername):
+        """
+        Takes a game and the name of the player to move and returns the result
+        for the player and the plies to the end, as probe does.
+        Returns None if the material is outside the table, the game is over or
+        is not played on the 7 x 7 board the table is built for.
+        """
+        if game.get_winner() is not None:
+            return None
+        if game.get_game_board().get_size() != (ROWS, COLS):
+            return None
+        color = game.get_color(playername)
+        opponent = game.get_opponent(playername)
+        captured = {color: game.get_captured(playername), game.get_color(opponent): game.get_captured(opponent)}
+        return self.probe(game.get_game_board().get_bitboard().get_state(),
+                          captured.get("W", 0), captured.get("B", 0), color)
+
+
+def main(argv=None):
+    """Command-line entry point, run with python -m Kubagame.tablebase"""
+    parser = argparse.ArgumentParser(description="Build a KubaGame endgame tablebase by retrograde analysis.")
+    parser.add_argument("--output", required=True, help="tablebase file to write")
+    parser.add_argument("--white", type=int, default=1, help="most white marbles")
+    parser.add_argument("--black", type=int, default=1, help="most black marbles")
+    parser.add_argument("--red", type=int, default=1, help="most red marbles")
+    args = parser.parse_args(argv)
+    solved = build_tablebase(args.output, args.white, args.black, args.red, progress=print)
+    print("%d positions solved and written to %s" % (solved, args.output))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,276 @@
+import argparse
+import contextlib
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .ai import AlphaBetaPlayer, GreedyPlayer, RandomPlayer
+from .bitboard import encode_move
+from .book import OpeningBook
+from .game import KubaGame
+from .mcts import MCTSPlayer
+from .record import GameRecord, GameRecordWriter
+from .tablebase import Tablebase
+
+# bot names accepted in a bot spec, and the class that plays for each
+BOTS = {
+    "random": RandomPlayer,
+    "greedy": GreedyPlayer,
+    "alphabeta": AlphaBetaPlayer,
+    "mcts": MCTSPlayer,
+}
+
+# games longer than this many moves are scored as a draw
+MAX_MOVES = 500
+
+
+def _parse_value(text):
+    """Takes a bot option value and returns it as an int, a float or the text itself"""
+    for convert in (int, float):
+        try:
+            return convert(text)
+        except ValueError:
+            pass
+    return text
+
+
+def parse_bot(spec):
+    """
+    Takes a bot spec such as "alphabeta:time_limit=0.05,max_depth=4" and returns
+    a tuple of the bot name and a dict of keyword arguments for its class.
+    Raises ValueError for an unknown bot or a badly formed option.
+    """
+    name, _, options = spec.partition(":")
+    if name not in BOTS:
+        raise ValueError("unknown bot %r, choose from %s" % (name, ", ".join(sorted(BOTS))))
+    kwargs = {}
+    if options:
+        for option in options.split(","):
+            key, equals, value = option.partition("=")
+            if not equals:
+                raise ValueError("bot option %r is not key=value" % option)
+            kwargs[key] = _parse_value(value)
+    return (name, kwargs)
+
+
+def make_bot(spec, seed):
+    """
+    Takes a bot spec and a random seed and returns a new bot playing it.
+    A book option is taken as the path of an opening book file to load, and a
+    tablebase option as the path of an endgame tablebase file to open.
+    """
+    name, kwargs = parse_bot(spec)
+    if name != "alphabeta" and "seed" not in kwargs:
+        kwargs["seed"] = seed
+    if "book" in kwargs:
+        kwargs["book"] = OpeningBook.load(kwargs["book"])
+    if "tablebase" in kwargs:
+        kwargs["tablebase"] = Tablebase(kwargs["tablebase"])
+    return BOTS[name](**kwargs)
+
+
+def play_game(task):
+    """
+    Takes a task tuple of (game id, first player label, first player spec,
+    second player label, second player spec, seed, max moves) and plays one game
+    in which the first player plays white and moves first.
+    Returns a dict with the players, winner, number of moves, red marbles
+    captured by each player, how the game ended, its duration in seconds and
+    the move codes of the game as bytes under "move_codes".
+    It is a module function so it can run in a worker process.
+    """
+    game_id, white, white_spec, black, black_spec, seed, max_moves = task
+    start = time.perf_counter()
+    game = KubaGame((white, "W"), (black, "B"))
+    bots = {white: make_bot(white_spec, seed), black: make_bot(black_spec, seed + 1)}
+    playername = white
+    moves = 0
+    move_codes = bytearray()
+    reason = "max_moves"
+    winner = None
+    while moves < max_moves:
+        move = bots[playername].search(game, playername)[0]
+        if move is None:
+            # a player who has no legal moves available has lost the game
+            winner = game.get_opponent(playername)
+            reason = "no_moves"
+            break
+        game.make_move(playername, move[0], move[1])
+        move_codes.append(encode_move(move[0], move[1]))
+        moves += 1
+        if game.get_winner() is not None:
+            winner = game.get_winner()
+            reason = "win"
+            break
+        playername = game.get_current_turn()
+    for bot in bots.values():
+        if hasattr(bot, "close"):
+            bot.close()
+    return {
+        "game": game_id,
+        "white": white,
+        "black": black,
+        "winner": winner,
+        "reason": reason,
+        "moves": moves,
+        "captured": {white: game.get_captured(white), black: game.get_captured(black)},
+        "duration": time.perf_counter() - start,
+        "move_codes": bytes(move_codes),
+    }
+
+
+def make_schedule(labels, specs, mode, games, seed, max_moves):
+    """
+    Takes the bot labels and specs, the pairing mode ("roundrobin" or
+    "gauntlet"), the number of games per pairing, a base seed and the move cap
+    and returns the list of game tasks. Colors alternate between the games of
+    a pairing. In a gauntlet the first bot plays every other bot.
+    """
+    if mode == "gauntlet":
+        pairs = [(0, index) for index in range(1, len(labels))]
+    else:
+        pairs = list(itertools.combinations(range(len(labels)), 2))
+    tasks = []
+    for first, second in pairs:
+        for number in range(games):
+            if number % 2:
+                first, second = second, first
+            game_id = len(tasks)
+            tasks.append((game_id, labels[first], specs[first], labels[second], specs[second],
+                          seed + game_id * 2, max_moves))
+            if number % 2:
+                first, second = second, first
+    return tasks
+
+
+def play_games(tasks):
+    """Takes a list of game tasks and plays them in order, returning the list of their results"""
+    return [play_game(task) for task in tasks]
+
+
+def _outcomes(tasks, executor, workers):
+    """
+    Takes the game tasks, a process pool or None and the number of workers and
+    yields the result of every game. With a pool the tasks are sent in small
+    chunks, and the results of each chunk are yielded as soon as it finishes,
+    so a long game does not hold back the games that finished after it.
+    """
+    if executor is None:
+        for task in tasks:
+            yield play_game(task)
+        return
+    chunksize = max(1, len(tasks) // (workers * 16))
+    futures = [executor.submit(play_games, tasks[start:start + chunksize])
+               for start in range(0, len(tasks), chunksize)]
+    for future in as_completed(futures):
+        for result in future.result():
+            yield result
+
+
+def run_tournament(tasks, workers, output=None, records=None):
+    """
+    Takes the game tasks, the number of worker processes, an optional file
+    object and an optional GameRecordWriter, plays every game and writes each
+    result to the file as a JSON line and each game to the writer as soon as it
+    is in, flushing the file after every line so a crash loses no finished game.
+    Returns the list of results in game order, without their move codes.
+    """
+    results = []
+    executor = None
+    if workers > 1:
+        executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        for result in _outcomes(tasks, executor, workers):
+            move_codes = result.pop("move_codes")
+            results.append(result)
+            if records is not None:
+                winner = None
+                if result["winner"] is not None:
+                    winner = (result["white"], result["black"]).index(result["winner"])
+                records.write(GameRecord((result["white"], "W"), (result["black"], "B"), 0, winner, move_codes))
+            if output is not None:
+                output.write(json.dumps(result) + "\n")
+                output.flush()
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    results.sort(key=lambda result: result["game"])
+    return results
+
+
+def summarize(results, labels, elapsed):
+    """
+    Takes the game results, the bot labels and the wall-clock time of the
+    tournament and returns the report text with games/sec, moves/sec and the
+    wins, draws, losses and score of each bot (1 for a win, 0.5 for a draw).
+    """
+    moves = sum(result["moves"] for result in results)
+    elapsed = max(elapsed, 1e-9)
+    records = {}
+    for label in labels:
+        records[label] = [0, 0, 0]
+    for result in results:
+        for label in (result["white"], result["black"]):
+            if result["winner"] is None:
+                records[label][1] += 1
+            elif result["winner"] == label:
+                records[label][0] += 1
+            else:
+                records[label][2] += 1
+    lines = ["%d games, %d moves in %.2f s: %.1f games/sec, %.1f moves/sec"
+             % (len(results), moves, elapsed, len(results) / elapsed, moves / elapsed),
+             "%-40s %7s %7s %7s %8s" % ("bot", "wins", "draws", "losses", "score")]
+    for label in sorted(labels, key=lambda label: -(records[label][0] + records[label][1] / 2)):
+        wins, draws, losses = records[label]
+        lines.append("%-40s %7d %7d %7d %8.1f" % (label, wins, draws, losses, wins + draws / 2))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """Command-line entry point, run with python -m Kubagame.tournament"""
+    parser = argparse.ArgumentParser(
+        description="Play a round-robin or gauntlet tournament between KubaGame bots.")
+    parser.add_argument("bots", nargs="+",
+                        help="bot specs such as random, greedy, alphabeta:time_limit=0.05 or mcts:iterations=200")
+    parser.add_argument("--mode", choices=("roundrobin", "gauntlet"), default="roundrobin",
+                        help="play every pairing, or the first bot against each other bot")
+    parser.add_argument("--games", type=int, default=2, help="games per pairing, colors alternate")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument("--output", help="file to stream JSON-lines results to")
+    parser.add_argument("--records", help="file to write the games to in the binary game-record format")
+    parser.add_argument("--max-moves", type=int, default=MAX_MOVES, help="moves before a game is a draw")
+    parser.add_argument("--seed", type=int, default=0, help="base random seed")
+    args = parser.parse_args(argv)
+
+    if len(args.bots) < 2:
+        parser.error("at least two bots are needed")
+    labels = []
+    for spec in args.bots:
+        try:
+            parse_bot(spec)
+        except ValueError as error:
+            parser.error(str(error))
+        label = spec
+        if label in labels:
+            label = "%s#%d" % (spec, len(labels) + 1)
+        labels.append(label)
+
+    tasks = make_schedule(labels, args.bots, args.mode, args.games, args.seed, args.max_moves)
+    start = time.perf_counter()
+    with contextlib.ExitStack() as stack:
+        output = None
+        records = None
+        if args.output:
+            output = stack.enter_context(open(args.output, "w"))
+        if args.records:
+            records = GameRecordWriter(stack.enter_context(open(args.records, "wb")))
+        results = run_tournament(tasks, args.workers, output, records)
+    print(summarize(results, labels, time.perf_counter() - start))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+from array import array
+
+from .bitboard import DIRECTIONS
+
+# bound types of a stored score
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# each entry is a 64-bit key and a 64-bit packed data word
+ENTRY_BYTES = 16
+
+# packed data layout, from the lowest bits up: move (16 bits, row << 9 |
+# column << 2 | direction index, so boards up to 127 x 127 fit, and _NO_MOVE
+# when no move is stored), bound (2 bits), depth (8 bits), search generation
+# (6 bits) and the score plus _SCORE_OFFSET
+_NO_MOVE = 0xFFFF
+_SCORE_OFFSET = 1 << 20
+_GENERATIONS = 64
+
+
+class TranspositionTable:
+    """
+    Fixed-size transposition table for the search.
+    It maps position keys to the depth, score, bound type and best move of an
+    earlier search of the position, packed into two flat arrays of 64-bit
+    integers so its memory use is fixed by the size given when it is created.
+    The table is made of buckets of two entries: the first keeps the deepest
+    search of the current generation and the second is always replaced, so
+    deep results survive while recent shallow ones still get stored.
+    """
+    def __init__(self, size_mb=16):
+        """
+        Initializing the table with a memory cap in megabytes. The number of
+        buckets is rounded down to a power of two that fits the cap.
+        """
+        buckets = 1
+        while buckets * 2 * 2 * ENTRY_BYTES <= size_mb * 1024 * 1024:
+            buckets *= 2
+        self._mask = buckets - 1
+        self._keys = array("Q", [0]) * (buckets * 2)
+        self._data = array("Q", [0]) * (buckets * 2)
+        self._generation = 0
+
+    def get_size(self):
+        """Returns the number of entries the table can hold"""
+        return len(self._keys)
+
+    def get_memory(self):
+        """Returns the memory used by the entries in bytes"""
+        return len(self._keys) * ENTRY_BYTES
+
+    def clear(self):
+        """Removes every entry from the table"""
+        self._keys = array("Q", [0]) * len(self._keys)
+        self._data = array("Q", [0]) * len(self._data)
+
+    def new_search(self):
+        """Starts a new search generation, so entries of earlier searches are replaced first"""
+        self._generation = (self._generation + 1) % _GENERATIONS
+
+    def probe(self, key):
+        """
+        Takes a position key and returns (depth, score, bound, move) stored for
+        it, where move is (coordinates, direction) or None.
+        Returns None if the position is not in the table.
+        """
+        index = (key & self._mask) * 2
+        keys = self._keys
+        if keys[index] != key:
+            index += 1
+            if keys[index] != key:
+                return None
+        data = self._data[index]
+        if not data:
+            return None
+        move = data & 0xFFFF
+        if move == _NO_MOVE:
+            move = None
+        else:
+            move = ((move >> 9, (move >> 2) & 0x7F), DIRECTIONS[move & 0x3])
+        return ((data >> 18) & 0xFF, (data >> 32) - _SCORE_OFFSET, (data >> 16) & 0x3, move)
+
+    def store(self, key, depth, score, bound, move):
+        """
+        Takes a position key, the search depth, score, bound type and best move
+        of the position and stores them. The depth-preferred entry of the bucket
+        is replaced if the position is already there, if it is from an earlier
+        search or if the new search is at least as deep; otherwise the new
+        result goes to the always-replace entry.
+        """
+        index = (key & self._mask) * 2
+        keys = self._keys
+        data = self._data
+        stored = data[index]
+        if (keys[index] != key and stored
+                and (stored >> 26) & 0x3F == self._generation
+                and (stored >> 18) & 0xFF > depth):
+            index += 1
+        if move is None:
+            code = _NO_MOVE
+        else:
+            (row, column), direction = move
+            code = (row << 9) | (column << 2) | DIRECTIONS.index(direction)
+        keys[index] = key
+        data[index] = (((score + _SCORE_OFFSET) << 32) | (self._generation << 26)
+                       | (min(depth, 0xFF) << 18) | (bound << 16) | code)
@@ -1,30 +1,135 @@
 import pygame
-from Kubagame.constants import WIDTH, HEIGHT
+from Kubagame.background import BackgroundBot
+from Kubagame.constants import WIDTH, HEIGHT, ROWS, COLS, SQUARE_SIZE
 from Kubagame.game import KubaGame
+from Kubagame.piece import SPRITES
+from Kubagame.render import BoardRenderer
 
-pygame.init()
 FPS = 60
-WIN = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption('Kuba Game')
+# sleep until an event arrives instead of ticking at FPS, the board only
+# changes on input or a move so there is nothing to draw in between
+EVENT_DRIVEN = True
+# events the loop acts on, others such as mouse motion do not wake it up
+EVENTS = [pygame.QUIT, pygame.MOUSEBUTTONDOWN, pygame.VIDEOEXPOSE]
+# bot spec of the computer opponent and the player it plays, BOT = None for
+# two players at the same screen
+BOT = "alphabeta:time_limit=2"
+BOT_PLAYER = 'PlayerB'
+# milliseconds between checks for the bot's move while it thinks
+BOT_POLL = 20
+# direction of a push toward the neighboring cell at each (row, column) offset
+PUSHES = {(0, -1): "L", (0, 1): "R", (-1, 0): "F", (1, 0): "B"}
+CAPTION = 'Kuba Game'
+
+def get_events(clock, timeout=None):
+    """
+    Takes the clock of the loop and an optional timeout in milliseconds and
+    returns the list of events to handle.
+    In event-driven mode it sleeps until an event arrives, or until timeout
+    passes, for example to draw the next frame of an animation, and returns
+    an empty list on a timeout. Otherwise it ticks the clock at FPS.
+    """
+    if not EVENT_DRIVEN:
+        clock.tick(FPS)
+        return pygame.event.get()
+    if timeout is None:
+        event = pygame.event.wait()
+    else:
+        event = pygame.event.wait(timeout)
+    if event.type == pygame.NOEVENT:
+        return []
+    # handle everything that queued up together with the event that woke us
+    return [event] + pygame.event.get()
+
+def get_cell(position):
+    """Takes a mouse position and returns the (row, column) of the cell under it, or None off the board"""
+    row, column = position[1] // SQUARE_SIZE, position[0] // SQUARE_SIZE
+    if 0 <= row < ROWS and 0 <= column < COLS:
+        return (row, column)
+    return None
+
+def show_winner(game):
+    """Puts the name of the winner in the window caption once the game is won"""
+    if game.get_winner() is not None:
+        pygame.display.set_caption('%s - %s wins' % (CAPTION, game.get_winner()))
 
 def main():
+    # the window is only opened here, so the bot's worker process, which
+    # imports this module again, does not open a window of its own
+    pygame.init()
+    win = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption(CAPTION)
     run = True
     clock = pygame.time.Clock()
-    game = KubaGame()
+    game = KubaGame(('PlayerA', 'W'), ('PlayerB', 'B'))
+    human = game.get_opponent(BOT_PLAYER)
+    # the marble images are loaded and scaled once, now that the display is set up
+    SPRITES.build_atlas()
+    renderer = BoardRenderer(game.get_game_board(), SPRITES.get_sprites())
+    if EVENT_DRIVEN:
+        pygame.event.set_blocked(None)
+        pygame.event.set_allowed(EVENTS)
+    # the bot searches in a worker process, so the window keeps drawing and
+    # handling input while it thinks
+    bot = None
+    if BOT is not None:
+        bot = BackgroundBot(BOT)
+    selected = None
 
     while run:
-        clock.tick(FPS)
+        # only the cells that changed since the last frame are sent to the
+        # display, and nothing is drawn if the board did not change
+        dirty = renderer.draw(win)
+        if dirty:
+            pygame.display.update(dirty)
 
-        for event in pygame.event.get():
+        # check for the bot's move every BOT_POLL milliseconds while it thinks
+        timeout = None
+        if bot is not None and bot.is_busy():
+            timeout = BOT_POLL
+        for event in get_events(clock, timeout):
             if event.type == pygame.QUIT:
                 run = False
 
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                pass
+            # click a marble, then the cell next to it to push the marble toward
+            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                cell = get_cell(event.pos)
+                playername = game.get_current_turn() or human
+                if bot is not None and playername == BOT_PLAYER:
+                    cell = None
+                if cell is not None and selected is not None:
+                    direction = PUSHES.get((cell[0] - selected[0], cell[1] - selected[1]))
+                    if direction is not None and game.make_move(playername, selected, direction):
+                        cell = None
+                        # a player left without a legal move has lost
+                        game.end_if_no_moves(game.get_current_turn())
+                        show_winner(game)
+                        if bot is not None and game.get_winner() is None:
+                            bot.submit(game, BOT_PLAYER)
+                selected = cell
+
+            # the window was uncovered or restored, so draw all of it again
+            if event.type == pygame.VIDEOEXPOSE:
+                renderer.invalidate()
 
-        board.draw_grid(WIN)
-        pygame.display.update()
+        if bot is not None and bot.is_busy():
+            result = bot.poll()
+            if result is not None:
+                move = result[0]
+                if move is None:
+                    # the bot has no legal moves, so it has lost
+                    game.end_if_no_moves(BOT_PLAYER)
+                else:
+                    game.make_move(BOT_PLAYER, move[0], move[1])
+                    game.end_if_no_moves(human)
+                show_winner(game)
+                # think about the reply while the player does
+                if game.get_winner() is None:
+                    bot.ponder(game, human)
 
+    if bot is not None:
+        bot.close()
     pygame.quit()
 
-main()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
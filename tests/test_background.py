@@ -0,0 +1,72 @@
+import asyncio
+import time
+import unittest
+
+from Kubagame.background import BackgroundBot
+from Kubagame.game import KubaGame
+
+
+def _new_game():
+    return KubaGame(("PlayerA", "W"), ("PlayerB", "B"))
+
+
+class BackgroundBotTest(unittest.TestCase):
+    """Runs bots in a worker thread, which behaves like the worker process without spawning one"""
+
+    def test_submit_and_wait(self):
+        game = _new_game()
+        with BackgroundBot("greedy", seed=1, use_process=False) as bot:
+            bot.submit(game, "PlayerA")
+            self.assertTrue(bot.is_busy())
+            # the game was copied, so changing it does not change the search
+            game.make_move("PlayerA", (6, 5), "F")
+            move, pv = bot.wait(10)
+            self.assertIn(move, _new_game().legal_moves("PlayerA"))
+            self.assertFalse(bot.is_busy())
+            self.assertIsNone(bot.poll())
+            self.assertIsNone(bot.wait(0.01))
+
+            bot.submit(game, "PlayerB")
+            move, pv = asyncio.run(bot.wait_async())
+            self.assertIn(move, game.legal_moves("PlayerB"))
+
+    def test_cancel(self):
+        with BackgroundBot("alphabeta:time_limit=30", use_process=False) as bot:
+            bot.submit(_new_game(), "PlayerA")
+            bot.cancel()
+            self.assertFalse(bot.is_busy())
+            self.assertIsNone(bot.poll())
+            start = time.perf_counter()
+        # the cancelled search stopped, so closing the bot did not wait for it
+        self.assertLess(time.perf_counter() - start, 10)
+
+    def test_stale_result_is_dropped(self):
+        first = _new_game()
+        second = _new_game()
+        second.make_move("PlayerA", (6, 5), "F")
+        with BackgroundBot("random", seed=1, use_process=False) as bot:
+            first_job = bot.submit(first, "PlayerA")
+            # let the first search finish, so its result is waiting in the queue
+            time.sleep(0.2)
+            second_job = bot.submit(second, "PlayerB")
+            self.assertNotEqual(first_job, second_job)
+            move, pv = bot.wait(10)
+            # white and black marbles never share a cell, so only a black move
+            # can be the result of the second search
+            self.assertIn(move, second.legal_moves("PlayerB"))
+            self.assertIsNone(bot.poll())
+
+    def test_bad_spec(self):
+        with self.assertRaises(ValueError):
+            BackgroundBot("nobody", use_process=False)
+        with BackgroundBot("alphabeta:bogus=1", use_process=False) as bot:
+            bot.submit(_new_game(), "PlayerA")
+            with self.assertRaises(RuntimeError):
+                bot.wait(10)
+            self.assertFalse(bot.is_busy())
+        with self.assertRaises(ValueError):
+            bot.submit(_new_game(), "PlayerA")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import random
+import unittest
+
+from Kubagame.bitboard import DIRECTIONS, decode_move
+from Kubagame.game import KubaGame
+
+try:
+    import numpy as np
+    from Kubagame.batch import BatchKubaGame, CELL_CODES
+except ImportError:
+    np = None
+
+_NAMES = ("p0", "p1")
+
+
+@unittest.skipIf(np is None, "the batch simulator needs NumPy")
+class BatchTest(unittest.TestCase):
+    """Checks that BatchKubaGame steps every game the same way as KubaGame.make_move"""
+
+    def _check_same(self, batch, games):
+        """Checks the boards, captures, turns and winners of the batch against the games"""
+        codes = dict((code, item) for item, code in CELL_CODES.items())
+        for index, game in enumerate(games):
+            board = [[codes[int(code)] for code in row] for row in batch.get_boards()[index]]
+            self.assertEqual(board, game.get_game_board().get_board())
+            self.assertEqual(list(batch.get_captured()[index]), [game.get_captured(name) for name in _NAMES])
+            turn = int(batch.get_turn()[index])
+            self.assertEqual(None if turn < 0 else _NAMES[turn], game.get_current_turn())
+            winner = int(batch.get_winner()[index])
+            self.assertEqual(None if winner < 0 else _NAMES[winner], game.get_winner())
+
+    def test_steps_match_make_move(self):
+        count = 64
+        rng = random.Random(1)
+        batch = BatchKubaGame(count)
+        games = [KubaGame(("p0", "W"), ("p1", "B")) for _ in range(count)]
+        for _ in range(300):
+            moves = []
+            for game in games:
+                player = rng.randrange(2)
+                turn = game.get_current_turn()
+                if turn is not None and rng.random() < 0.8:
+                    player = _NAMES.index(turn)
+                legal = game.legal_moves(_NAMES[player])
+                if legal and rng.random() < 0.7:
+                    coordinates, direction = rng.choice(legal)
+                else:
+                    coordinates, direction = (rng.randrange(7), rng.randrange(7)), rng.choice(DIRECTIONS)
+                # now and then a player id that is not a player of the game
+                if rng.random() < 0.05:
+                    player = rng.choice((-1, 2, 5))
+                moves.append((player, coordinates, direction))
+            valid = batch.step([move[0] for move in moves],
+                               [move[1][0] for move in moves],
+                               [move[1][1] for move in moves],
+                               [DIRECTIONS.index(move[2]) for move in moves])
+            for index, (player, coordinates, direction) in enumerate(moves):
+                playername = _NAMES[player] if player in (0, 1) else "nobody"
+                self.assertEqual(bool(valid[index]), games[index].make_move(playername, coordinates, direction))
+            self._check_same(batch, games)
+
+            # the legal move masks match legal_moves of the player to move
+            masks = batch.legal_moves_mask()
+            for index, game in enumerate(games):
+                playername = game.get_current_turn() or _NAMES[0]
+                legal = [decode_move(code) for code in np.nonzero(masks[index])[0]]
+                self.assertEqual(sorted(legal), sorted(game.legal_moves(playername)))
+
+            finished = [index for index, game in enumerate(games) if game.get_winner() is not None]
+            if finished:
+                batch.reset(np.array(finished))
+                for index in finished:
+                    games[index] = KubaGame(("p0", "W"), ("p1", "B"))
+
+
+if __name__ == "__main__":
+    unittest.main()
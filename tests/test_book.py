@@ -0,0 +1,98 @@
+import os
+import tempfile
+import unittest
+
+from Kubagame.bitboard import ZOBRIST_TURN
+from Kubagame.book import OpeningBook, book_key, build_book, main
+from Kubagame.game import KubaGame
+from Kubagame.record import GameRecordWriter
+from tests.test_record import _random_game
+
+
+def _new_game():
+    return KubaGame(("PlayerA", "W"), ("PlayerB", "B"))
+
+
+def _read(path):
+    with open(path, "rb") as stream:
+        return stream.read()
+
+
+class OpeningBookTest(unittest.TestCase):
+    """Checks book keys, probing and the book file"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_book_key_folds_the_mover_before_the_first_move(self):
+        game = _new_game()
+        self.assertEqual(book_key(game, "PlayerA"), game.position_key() ^ ZOBRIST_TURN["W"])
+        self.assertEqual(book_key(game, "PlayerB"), game.position_key() ^ ZOBRIST_TURN["B"])
+        self.assertNotEqual(book_key(game, "PlayerA"), book_key(game, "PlayerB"))
+        game.make_move("PlayerA", (6, 5), "F")
+        self.assertEqual(book_key(game, "PlayerB"), game.position_key())
+
+    def test_probe(self):
+        game = _new_game()
+        key = book_key(game, "PlayerA")
+        opening_book = OpeningBook(min_games=4)
+        self.assertIsNone(opening_book.probe(game, "PlayerA"))
+        for _ in range(3):
+            opening_book.add(key, ((6, 5), "F"), 2)
+        # a move needs min_games games before it is played
+        self.assertIsNone(opening_book.probe(game, "PlayerA"))
+        opening_book.add(key, ((6, 5), "F"), 0)
+        self.assertEqual(opening_book.probe(game, "PlayerA"), ((6, 5), "F"))
+        self.assertEqual(opening_book.get_moves(key), {((6, 5), "F"): (4, 3.0)})
+        # a better scored move is preferred, an illegal one is never played
+        for _ in range(5):
+            opening_book.add(key, ((0, 0), "B"), 2)
+            opening_book.add(key, ((0, 5), "B"), 2)
+        self.assertEqual(opening_book.probe(game, "PlayerA"), ((0, 0), "B"))
+        # the book is keyed by the player to move
+        self.assertIsNone(opening_book.probe(game, "PlayerB"))
+
+    def test_save_load_and_build(self):
+        paths = []
+        for number in range(2):
+            paths.append(os.path.join(self.directory.name, "games%d.kgr" % number))
+            with open(paths[-1], "wb") as stream:
+                writer = GameRecordWriter(stream)
+                for seed in range(number * 20, number * 20 + 20):
+                    players, moves, first_player, game = _random_game(seed)
+                    writer.write_game(players[0], players[1], moves, first_player)
+        streams = [open(path, "rb") for path in paths]
+        try:
+            opening_book = build_book(streams, max_plies=6, min_games=1)
+        finally:
+            for stream in streams:
+                stream.close()
+        self.assertGreater(opening_book.get_position_count(), 20)
+
+        path = os.path.join(self.directory.name, "book.kbk")
+        opening_book.save(path)
+        loaded = OpeningBook.load(path, min_games=1)
+        self.assertEqual(loaded.get_position_count(), opening_book.get_position_count())
+        again = os.path.join(self.directory.name, "again.kbk")
+        loaded.save(again)
+        self.assertEqual(_read(again), _read(path))
+        game = KubaGame(("white", "W"), ("black", "B"))
+        self.assertEqual(loaded.probe(game, "white"), opening_book.probe(game, "white"))
+        self.assertIsNotNone(loaded.probe(game, "white"))
+
+        # the command line builds the same book
+        output = os.path.join(self.directory.name, "cli.kbk")
+        main(paths + ["--output", output, "--plies", "6", "--min-games", "1"])
+        self.assertEqual(_read(output), _read(path))
+
+        with open(path, "wb") as stream:
+            stream.write(b"NOPE" + bytes(8))
+        with self.assertRaises(ValueError):
+            OpeningBook.load(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
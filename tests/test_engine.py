@@ -0,0 +1,106 @@
+import random
+import unittest
+
+from Kubagame.game import KubaGame
+from Kubagame.perft import reference_push
+
+# (coordinates, direction) of every move on the 7 x 7 board, plus some that
+# are out of range or have a bad direction
+_MOVES = ([((row, column), direction) for row in range(7) for column in range(7) for direction in "LRFB"]
+          + [((7, 0), "L"), ((0, 7), "R"), ((-1, 3), "F"), ((3, -1), "B"), ((0, 0), "X")])
+
+
+class EngineTest(unittest.TestCase):
+    """
+    Checks the bitboard rules engine against the original list-based rules:
+    every cell and direction is tried for both players at every ply of random
+    games and compared with the grid-walking reference push.
+    """
+
+    def test_readme_example(self):
+        game = KubaGame(("PlayerA", "W"), ("PlayerB", "B"))
+        self.assertEqual(game.get_marble_count(), (8, 8, 13))
+        self.assertEqual(game.get_captured("PlayerA"), 0)
+        self.assertIsNone(game.get_current_turn())
+        self.assertTrue(game.make_move("PlayerA", (6, 5), "F"))
+        self.assertEqual(game.get_current_turn(), "PlayerB")
+        self.assertFalse(game.make_move("PlayerA", (6, 5), "L"))
+        self.assertEqual(game.get_marble((5, 5)), "W")
+        self.assertIsNone(game.get_winner())
+
+    def test_no_legal_moves_loses(self):
+        game = KubaGame(("PlayerA", "W"), ("PlayerB", "B"))
+        self.assertFalse(game.end_if_no_moves("PlayerB"))
+        self.assertIsNone(game.get_winner())
+        # every black push is blocked or pushes a black marble off
+        game = KubaGame(("PlayerA", "W"), ("PlayerB", "B"), layout=["BBB", "BWB", "BBB"])
+        self.assertEqual(game.legal_moves("PlayerB"), [])
+        self.assertTrue(game.end_if_no_moves("PlayerB"))
+        self.assertEqual(game.get_winner(), "PlayerA")
+        self.assertFalse(game.end_if_no_moves("PlayerA"))
+
+    def _expected(self, game, board, history, playername, coordinates, direction):
+        """
+        Returns (board, captured) the original rules give for the move, or None
+        if they reject it. history is the list of boards before each move made.
+        """
+        turn = game.get_current_turn()
+        if game.get_winner() is not None or (turn is not None and turn != playername):
+            return None
+        row, column = coordinates
+        if direction not in "LRFB" or not (0 <= row < 7 and 0 <= column < 7):
+            return None
+        color = game.get_color(playername)
+        if board[row][column] != color:
+            return None
+        pushed = reference_push(board, coordinates, direction, color)
+        if pushed is None:
+            return None
+        # a move cannot bring back the board from before the opponent's last move
+        if history and pushed[0] == history[-1]:
+            return None
+        return pushed
+
+    def test_every_move_matches_original_rules(self):
+        players = ("PlayerA", "PlayerB")
+        for seed in range(12):
+            rng = random.Random(seed)
+            game = KubaGame(("PlayerA", "W"), ("PlayerB", "B"))
+            history = []
+            for _ in range(150):
+                board = game.get_game_board().get_board()
+                captured = [game.get_captured(playername) for playername in players]
+                accepted = []
+                for playername in players:
+                    for coordinates, direction in _MOVES:
+                        expected = self._expected(game, board, history, playername, coordinates, direction)
+                        record = game.apply_move(playername, coordinates, direction)
+                        self.assertEqual(record is not None, expected is not None,
+                                         (seed, playername, coordinates, direction))
+                        if record is None:
+                            continue
+                        self.assertEqual(game.get_game_board().get_board(), expected[0])
+                        changes = [[row, column, expected[0][row][column]]
+                                   for row in range(7) for column in range(7)
+                                   if board[row][column] != expected[0][row][column]]
+                        self.assertEqual(game.get_game_board().get_bitboard().get_push_changes(record[0]),
+                                         changes)
+                        marbles = tuple(sum(cells.count(color) for cells in expected[0]) for color in "WBR")
+                        self.assertEqual(game.get_marble_count(), marbles)
+                        reds = game.get_captured(playername) - captured[players.index(playername)]
+                        self.assertEqual(reds, 1 if expected[1] == "R" else 0)
+                        game.undo_move(record)
+                        self.assertEqual(game.get_game_board().get_board(), board)
+                        accepted.append((playername, coordinates, direction))
+                if not accepted:
+                    break
+                playername, coordinates, direction = rng.choice(accepted)
+                history.append(board)
+                self.assertTrue(game.make_move(playername, coordinates, direction))
+                if game.get_winner() is not None:
+                    break
+                self.assertFalse(game.make_move(playername, coordinates, direction))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import random
+import unittest
+
+from Kubagame.game import KubaGame
+from Kubagame.mcts import MCTSPlayer, _search_tree
+
+
+class MCTSPlayerTest(unittest.TestCase):
+    """Checks the moves of the MCTS player and the merging of root-parallel trees"""
+
+    def _game(self):
+        game = KubaGame(("PlayerA", "W"), ("PlayerB", "B"))
+        game.make_move("PlayerA", (6, 5), "F")
+        return game
+
+    def test_search_leaves_the_game_unchanged(self):
+        for policy in ("random", "light"):
+            game = self._game()
+            board = game.get_game_board().get_board()
+            key = game.position_key()
+            player = MCTSPlayer(iterations=60, policy=policy, seed=3)
+            move, pv = player.search(game, "PlayerB")
+            self.assertIn(move, game.legal_moves("PlayerB"))
+            self.assertEqual(pv[0], move)
+            self.assertEqual(player.get_playouts(), 60)
+            self.assertEqual(game.get_game_board().get_board(), board)
+            self.assertEqual(game.position_key(), key)
+            self.assertEqual(game.get_current_turn(), "PlayerB")
+            self.assertIsNone(game.get_winner())
+        self.assertEqual(player.search(game, "PlayerA"), (None, []))
+
+    def test_root_parallel_merge(self):
+        game = self._game()
+        player = MCTSPlayer(iterations=80, workers=2, seed=5)
+        try:
+            move, pv = player.search(game, "PlayerB")
+        finally:
+            player.close()
+        self.assertIn(move, game.legal_moves("PlayerB"))
+        self.assertEqual(pv, [move])
+        self.assertEqual(player.get_playouts(), 80)
+        visits = player.get_visits()
+        self.assertEqual(sum(visits[root_move][0] for root_move in visits), 80)
+
+        # the merged statistics are the sums of the trees of the workers
+        rng = random.Random(5)
+        expected = {}
+        for _ in range(2):
+            stats = _search_tree(game, "PlayerB", 40, None, "random", 1.4, rng.getrandbits(64))[0]
+            for root_move, (count, wins) in stats.items():
+                merged_count, merged_wins = expected.get(root_move, (0, 0.0))
+                expected[root_move] = (merged_count + count, merged_wins + wins)
+        self.assertEqual(visits, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
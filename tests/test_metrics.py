@@ -0,0 +1,118 @@
+import random
+import unittest
+
+from Kubagame.game import KubaGame
+from Kubagame.metrics import PHASES, REJECT_REASONS, MoveMetrics
+
+# (layout, moves) where the last move is rejected for each reason and every
+# move before it is made
+_REJECTS = {
+    "wrong_turn": (None, [("PlayerA", (6, 5), "F"), ("PlayerA", (6, 6), "F")]),
+    "out_of_range": (None, [("PlayerA", (7, 0), "L")]),
+    "unknown_player": (None, [("Nobody", (0, 0), "R")]),
+    "wrong_color": (None, [("PlayerA", (0, 5), "L")]),
+    # seven reds pushed off win the game, so black cannot move after that
+    "game_over": (["XWR"] * 7 + ["BXX"],
+                  [move for row in range(7)
+                   for move in (("PlayerA", (row, 1), "R"), ("PlayerB", (7, row % 2), "LR"[row % 2 == 0]))]),
+    "bad_direction": (None, [("PlayerA", (0, 0), "X")]),
+    "blocked": (None, [("PlayerA", (0, 0), "L")]),
+    "self_push_off": (None, [("PlayerA", (0, 1), "L")]),
+    # black pushing the line back would undo white's move
+    "ko": (["XWBX"], [("PlayerA", (0, 1), "R"), ("PlayerB", (0, 3), "L")]),
+}
+
+
+class MoveMetricsTest(unittest.TestCase):
+    """Checks the counters and phases recorded for made and rejected moves"""
+
+    def _game(self, layout=None):
+        return KubaGame(("PlayerA", "W"), ("PlayerB", "B"), layout=layout)
+
+    def test_every_reject_reason(self):
+        self.assertEqual(sorted(_REJECTS), sorted(REJECT_REASONS))
+        for reason in REJECT_REASONS:
+            layout, moves = _REJECTS[reason]
+            game = self._game(layout)
+            metrics = MoveMetrics()
+            game.set_metrics(metrics)
+            for playername, coordinates, direction in moves[:-1]:
+                self.assertTrue(game.make_move(playername, coordinates, direction), (reason, coordinates))
+            self.assertFalse(game.make_move(*moves[-1]), reason)
+            snapshot = metrics.snapshot()
+            rejected = dict.fromkeys(REJECT_REASONS, 0)
+            rejected[reason] = 1
+            self.assertEqual(snapshot["rejected"], rejected)
+            self.assertEqual(snapshot["calls"], len(moves))
+            self.assertEqual(snapshot["accepted"], len(moves) - 1)
+            self.assertIn('kubagame_make_move_rejected_total{reason="%s"} 1\n' % reason, metrics.to_prometheus())
+        self.assertEqual(game.get_metrics(), metrics)
+
+    def test_snapshot_of_a_win(self):
+        layout, moves = _REJECTS["game_over"]
+        game = self._game(layout)
+        metrics = MoveMetrics()
+        game.set_metrics(metrics)
+        for move in moves[:-1]:
+            game.make_move(*move)
+        snapshot = metrics.snapshot()
+        self.assertEqual(game.get_winner(), "PlayerA")
+        self.assertEqual(snapshot["wins"], 1)
+        self.assertEqual(snapshot["captured"], {"W": 0, "B": 0, "R": 7})
+        # every phase is timed once for each accepted move
+        for phase in PHASES:
+            self.assertEqual(snapshot["phases"][phase]["count"], len(moves) - 1, phase)
+            self.assertGreaterEqual(snapshot["phases"][phase]["seconds"], 0)
+        text = metrics.to_prometheus("kuba")
+        self.assertIn("# TYPE kuba_calls_total counter\nkuba_calls_total 13\n", text)
+        self.assertIn('kuba_captured_total{marble="R"} 7\n', text)
+        metrics.reset()
+        self.assertEqual(metrics.snapshot()["calls"], 0)
+
+    def test_phase_counts_stop_at_the_rejecting_phase(self):
+        game = self._game()
+        metrics = MoveMetrics()
+        game.set_metrics(metrics)
+        game.make_move("PlayerA", (0, 0), "X")
+        game.make_move("PlayerA", (0, 0), "L")
+        counts = dict((phase, values["count"]) for phase, values in metrics.snapshot()["phases"].items())
+        self.assertEqual(counts, {"lookup": 2, "validate": 2, "push": 1, "ko": 0,
+                                  "history": 0, "capture": 0, "winner": 0})
+
+    def test_same_game_with_and_without_metrics(self):
+        for seed in range(6):
+            rng = random.Random(seed)
+            plain, measured = self._game(), self._game()
+            metrics = MoveMetrics()
+            measured.set_metrics(metrics)
+            tried = accepted = 0
+            playername = "PlayerA"
+            for _ in range(120):
+                legal = plain.legal_moves(playername)
+                if not legal:
+                    break
+                # a few moves that may be rejected, then a legal one
+                moves = [((rng.randrange(-1, 8), rng.randrange(-1, 8)), rng.choice("LRFBX"),
+                          rng.choice(("PlayerA", "PlayerB"))) for _ in range(4)]
+                moves.append(rng.choice(legal) + (playername,))
+                for coordinates, direction, name in moves:
+                    made = plain.make_move(name, coordinates, direction)
+                    self.assertEqual(measured.make_move(name, coordinates, direction), made)
+                    tried += 1
+                    accepted += made
+                self.assertEqual(measured.get_game_board().get_board(), plain.get_game_board().get_board())
+                self.assertEqual(measured.get_current_turn(), plain.get_current_turn())
+                self.assertEqual(measured.get_winner(), plain.get_winner())
+                self.assertEqual(measured.get_captured("PlayerA"), plain.get_captured("PlayerA"))
+                self.assertEqual(measured.get_captured("PlayerB"), plain.get_captured("PlayerB"))
+                if plain.get_winner() is not None:
+                    break
+                playername = plain.get_current_turn()
+            snapshot = metrics.snapshot()
+            self.assertEqual(snapshot["calls"], tried)
+            self.assertEqual(snapshot["accepted"], accepted)
+            self.assertEqual(sum(snapshot["rejected"].values()), tried - accepted)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import random
+import unittest
+
+from Kubagame.game import KubaGame
+from Kubagame.perft import perft, reference_moves, reference_push
+
+
+class ReferencePushTest(unittest.TestCase):
+    """Checks the grid-walking reference push on small hand-made boards"""
+
+    def test_push_into_empty_cell(self):
+        board = [["W", "B", "X", "X"]]
+        self.assertEqual(reference_push(board, (0, 0), "R", "W"), ([["X", "W", "B", "X"]], "X"))
+        self.assertEqual(board, [["W", "B", "X", "X"]])
+
+    def test_blocked_from_behind(self):
+        board = [["W", "W", "X", "X"]]
+        self.assertIsNone(reference_push(board, (0, 1), "R", "W"))
+
+    def test_push_off_edge(self):
+        board = [["X"], ["W"], ["R"]]
+        self.assertEqual(reference_push(board, (1, 0), "B", "W"), ([["X"], ["X"], ["W"]], "R"))
+
+    def test_no_self_push_off(self):
+        board = [["X", "W", "B", "W"]]
+        self.assertIsNone(reference_push(board, (0, 1), "R", "W"))
+        self.assertIsNone(reference_push([["W", "X"]], (0, 0), "L", "W"))
+
+
+class PerftTest(unittest.TestCase):
+    """Checks legal_moves and apply_move against the reference from the start and in random games"""
+
+    def test_start_position_counts(self):
+        game = KubaGame(("white", "W"), ("black", "B"))
+        for depth, nodes in ((1, 8), (2, 64), (3, 640)):
+            self.assertEqual(perft(game, "white", depth), nodes)
+            self.assertEqual(perft(game, "white", depth, reference=True), nodes)
+
+    def test_random_games_match_reference(self):
+        for size in (7, 9):
+            for seed in range(3):
+                rng = random.Random(seed)
+                game = KubaGame(("white", "W"), ("black", "B"), size)
+                playername = rng.choice(("white", "black"))
+                for _ in range(60):
+                    moves = game.legal_moves(playername)
+                    self.assertEqual(moves, reference_moves(game, playername))
+                    if not moves:
+                        break
+                    # every move and reply is made and checked against the reference
+                    perft(game, playername, 2, reference=True)
+                    coordinates, direction = rng.choice(moves)
+                    game.make_move(playername, coordinates, direction)
+                    if game.get_winner() is not None:
+                        break
+                    playername = game.get_opponent(playername)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import io
+import os
+import tempfile
+import unittest
+
+from Kubagame.game import KubaGame
+from Kubagame.posdb import PositionIndex, build_index
+from Kubagame.record import GameRecordWriter, read_games
+from tests.test_record import _random_game
+
+
+class PositionIndexTest(unittest.TestCase):
+    """Checks index lookups and stats against a brute-force replay of the same games"""
+
+    def test_lookup_matches_replay(self):
+        stream = io.BytesIO()
+        writer = GameRecordWriter(stream)
+        for seed in range(60):
+            players, moves, first_player, game = _random_game(seed)
+            winner = None
+            if game.get_winner() is not None:
+                winner = [name for name, color in players].index(game.get_winner())
+            writer.write_game(players[0], players[1], moves, first_player, winner)
+
+        # every (game id, ply) each position key was reached at, and each game's result
+        expected = {}
+        results = []
+        stream.seek(0)
+        for game_id, record in enumerate(read_games(stream)):
+            players = record.get_players()
+            expected.setdefault(KubaGame(players[0], players[1]).position_key(), []).append((game_id, 0))
+            for ply, game in enumerate(record.replay(KubaGame), 1):
+                expected.setdefault(game.position_key(), []).append((game_id, ply))
+            winner = record.get_winner()
+            results.append(None if winner is None else players[winner][1])
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "positions.kpdb")
+            stream.seek(0)
+            # small chunks so the entries are merged from several run files
+            self.assertEqual(build_index([stream], path, chunk_entries=500), 60)
+            with PositionIndex(path) as index:
+                self.assertEqual(index.get_game_count(), 60)
+                self.assertEqual(index.get_entry_count(), sum(len(found) for found in expected.values()))
+                for game_id, result in enumerate(results):
+                    self.assertEqual(index.get_result(game_id), result)
+                for key, found in expected.items():
+                    self.assertEqual(sorted(index.lookup(key)), sorted(found))
+                    games = set(game_id for game_id, ply in found)
+                    stats = (sum(results[game_id] == "W" for game_id in games),
+                             sum(results[game_id] == "B" for game_id in games),
+                             sum(results[game_id] is None for game_id in games))
+                    self.assertEqual(index.stats(key), stats)
+                self.assertEqual(index.lookup(12345), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import io
+import random
+import unittest
+
+from Kubagame.game import KubaGame
+from Kubagame.record import GameRecord, GameRecordWriter, read_games
+
+
+def _random_game(seed):
+    """Plays a random game and returns the players, the moves made, the first player index and the game"""
+    rng = random.Random(seed)
+    players = (("white", "W"), ("black", "B"))
+    game = KubaGame(players[0], players[1])
+    first_player = rng.randrange(2)
+    playername = players[first_player][0]
+    moves = []
+    for _ in range(rng.randrange(1, 200)):
+        legal = game.legal_moves(playername)
+        if not legal:
+            break
+        move = rng.choice(legal)
+        game.make_move(playername, move[0], move[1])
+        moves.append(move)
+        if game.get_winner() is not None:
+            break
+        playername = game.get_opponent(playername)
+    return players, moves, first_player, game
+
+
+class GameRecordTest(unittest.TestCase):
+    """Checks that game records round-trip through a file and replay to the same position"""
+
+    def test_write_read_replay(self):
+        stream = io.BytesIO()
+        writer = GameRecordWriter(stream)
+        played = []
+        for seed in range(40):
+            players, moves, first_player, game = _random_game(seed)
+            winner = None
+            if game.get_winner() is not None:
+                winner = [name for name, color in players].index(game.get_winner())
+            writer.write_game(players[0], players[1], moves, first_player, winner)
+            played.append((players, moves, first_player, winner, game))
+
+        stream.seek(0)
+        records = list(read_games(stream))
+        self.assertEqual(len(records), len(played))
+        for record, (players, moves, first_player, winner, game) in zip(records, played):
+            self.assertEqual(record.get_players(), players)
+            self.assertEqual(record.get_moves(), moves)
+            self.assertEqual(record.get_first_player(), first_player)
+            self.assertEqual(record.get_winner(), winner)
+            for replayed in record.replay(KubaGame):
+                pass
+            self.assertEqual(replayed.position_key(), game.position_key())
+            self.assertEqual(replayed.get_winner(), game.get_winner())
+
+    def test_bad_files(self):
+        with self.assertRaises(ValueError):
+            list(read_games(io.BytesIO(b"NOPE\x01")))
+        with self.assertRaises(ValueError):
+            list(read_games(io.BytesIO(b"KUBA")))
+        with self.assertRaises(ValueError):
+            list(read_games(io.BytesIO(b"")))
+        stream = io.BytesIO()
+        GameRecordWriter(stream).write_game(("a", "W"), ("b", "B"), [((6, 5), "F"), ((0, 5), "B")])
+        with self.assertRaises(ValueError):
+            list(read_games(io.BytesIO(stream.getvalue()[:-1])))
+
+    def test_invalid_move_in_replay(self):
+        record = GameRecord(("a", "W"), ("b", "B"), 0, None, bytes([0]))
+        with self.assertRaises(ValueError):
+            list(record.replay(KubaGame))
+
+
+if __name__ == "__main__":
+    unittest.main()
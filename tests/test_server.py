@@ -0,0 +1,106 @@
+import asyncio
+import json
+import unittest
+
+from Kubagame.server import MAX_LINE, GameServer
+
+
+class ServerTest(unittest.IsolatedAsyncioTestCase):
+    """Plays sessions over a real TCP socket, with two clients connected to the server"""
+
+    async def asyncSetUp(self):
+        self.server = GameServer()
+        self.listener = await asyncio.start_server(self.server.handle_connection, "127.0.0.1", 0, limit=MAX_LINE)
+        self.port = self.listener.sockets[0].getsockname()[1]
+        self.connections = []
+
+    async def asyncTearDown(self):
+        for reader, writer in self.connections:
+            writer.close()
+        self.listener.close()
+        await self.listener.wait_closed()
+
+    async def connect(self):
+        connection = await asyncio.open_connection("127.0.0.1", self.port)
+        self.connections.append(connection)
+        return connection
+
+    async def request(self, connection, request):
+        reader, writer = connection
+        if isinstance(request, dict):
+            request = json.dumps(request)
+        writer.write(request.encode("utf-8") + b"\n")
+        await writer.drain()
+        return await self.receive(connection)
+
+    async def receive(self, connection):
+        line = await asyncio.wait_for(connection[0].readline(), timeout=5)
+        self.assertTrue(line, "the server closed the connection")
+        return json.loads(line)
+
+    async def test_play_session(self):
+        alice, bob = await self.connect(), await self.connect()
+        response = await self.request(alice, {"op": "create", "session": "s", "id": 1,
+                                              "players": [["alice", "W"], ["bob", "B"]]})
+        self.assertTrue(response["ok"])
+        self.assertEqual(response["id"], 1)
+        self.assertEqual(response["state"]["board"][6], "BBXXXWW")
+        self.assertTrue((await self.request(alice, {"op": "join", "session": "s", "player": "alice"}))["ok"])
+        self.assertTrue((await self.request(bob, {"op": "join", "session": "s", "player": "bob"}))["ok"])
+
+        response = await self.request(alice, {"op": "move", "session": "s", "coordinates": [6, 5], "direction": "F"})
+        self.assertTrue(response["ok"])
+        self.assertEqual(response["changed"], [[4, 5, "W"], [6, 5, "X"]])
+        self.assertEqual(response["turn"], "bob")
+        event = await self.receive(bob)
+        self.assertEqual(event["event"], "move")
+        self.assertEqual(event["player"], "alice")
+        self.assertEqual(event["changed"], response["changed"])
+
+        # it is bob's turn now, and alice cannot move as bob
+        response = await self.request(alice, {"op": "move", "session": "s", "coordinates": [6, 5], "direction": "F"})
+        self.assertEqual(response, {"ok": False, "session": "s", "error": "invalid move"})
+
+        state = (await self.request(bob, {"op": "state", "session": "s"}))["state"]
+        self.assertEqual(state["board"][4], "XXRRRWX")
+        self.assertEqual(state["turn"], "bob")
+        self.assertEqual(state["marbles"], [8, 8, 13])
+
+        self.assertTrue((await self.request(alice, {"op": "leave", "session": "s"}))["ok"])
+        response = await self.request(alice, {"op": "move", "session": "s", "coordinates": [6, 6], "direction": "F"})
+        self.assertFalse(response["ok"])
+
+        self.assertTrue((await self.request(alice, {"op": "close", "session": "s"}))["ok"])
+        self.assertEqual((await self.receive(bob))["event"], "closed")
+        self.assertEqual(self.server.get_session_count(), 0)
+
+    async def test_bad_requests(self):
+        client = await self.connect()
+        bad = [
+            "{bad json",
+            "[1, 2]",
+            {"op": "nope"},
+            {"op": "state"},
+            {"op": "state", "session": "missing"},
+            {"op": "create", "session": "t", "players": [["A"], ["B"]]},
+            {"op": "create", "session": "t", "players": [[["A"], "W"], ["B", "B"]]},
+            {"op": "create", "session": "t", "players": "AB"},
+            {"op": "create", "session": "t", "players": [["A", "W"], ["A", "B"]]},
+            {"op": "create", "session": "t", "players": [["A", "W"], ["B", "R"]]},
+            {"op": "create", "session": "t", "players": [["A", "W"], ["B", "B"]], "size": 6},
+            {"op": "join", "session": "missing", "player": "A"},
+        ]
+        for request in bad:
+            response = await self.request(client, request)
+            self.assertFalse(response["ok"], request)
+            self.assertIn("error", response)
+        # the connection is still served and no broken session was left behind
+        self.assertEqual(self.server.get_session_count(), 0)
+        response = await self.request(client, {"op": "create", "session": "t", "players": [["A", "W"], ["B", "B"]]})
+        self.assertTrue(response["ok"])
+        response = await self.request(client, {"op": "move", "session": "t", "coordinates": [6, 5], "direction": "F"})
+        self.assertEqual(response["error"], "join the session as a player to move")
+
+
+if __name__ == "__main__":
+    unittest.main()
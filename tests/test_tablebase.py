@@ -0,0 +1,97 @@
+import itertools
+import os
+import tempfile
+import unittest
+
+from Kubagame.bitboard import BitBoard, COLORS
+from Kubagame.game import KubaGame
+from Kubagame.tablebase import DRAW, LOSS, WIN, Tablebase, build_tablebase
+
+# plies the brute-force search looks ahead
+_DEPTH = 5
+
+
+def _search(bitboard, state, side, depth, memo):
+    """
+    Takes a position with one white and one black marble and no reds, the
+    color to move and a depth, and returns (WIN, plies) or (LOSS, plies) if
+    the result is decided within depth plies with best play, or None.
+    """
+    key = (state, side, depth)
+    if key in memo:
+        return memo[key]
+    color = COLORS[side]
+    bitboard.set_state(state)
+    children = []
+    for coordinates, direction in bitboard.legal_pushes(color):
+        record = bitboard.push(coordinates, direction, color)
+        children.append(bitboard.get_state())
+        bitboard.undo_push(record)
+    result = None
+    if not children:
+        result = (LOSS, 0)
+    elif any(child[1 - side] == 0 for child in children):
+        result = (WIN, 1)
+    elif depth > 1:
+        outcomes = [_search(bitboard, child, 1 - side, depth - 1, memo) for child in children]
+        losses = [outcome[1] for outcome in outcomes if outcome is not None and outcome[0] == LOSS]
+        if losses:
+            result = (WIN, min(losses) + 1)
+        elif all(outcome is not None for outcome in outcomes):
+            result = (LOSS, max(outcome[1] for outcome in outcomes) + 1)
+    memo[key] = result
+    return result
+
+
+class TablebaseTest(unittest.TestCase):
+    """Builds a table of one white and one black marble and checks it against a brute-force search"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.path = os.path.join(cls.directory.name, "tb.bin")
+        build_tablebase(cls.path, max_white=1, max_black=1, max_red=0)
+        cls.tablebase = Tablebase(cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tablebase.close()
+        cls.directory.cleanup()
+
+    def test_probes_match_search(self):
+        self.assertEqual(self.tablebase.get_limits(), (1, 1, 0))
+        bitboard = BitBoard()
+        memo = {}
+        decided = 0
+        for white, black in itertools.permutations(range(49), 2):
+            state = (1 << white, 1 << black, 0)
+            for side in (0, 1):
+                probed = self.tablebase.probe(state, 0, 0, COLORS[side])
+                searched = _search(bitboard, state, side, _DEPTH, memo)
+                if probed[0] == DRAW or probed[1] > _DEPTH:
+                    self.assertIsNone(searched, (state, side, probed))
+                else:
+                    self.assertEqual(searched, probed, (state, side))
+                    decided += 1
+        self.assertGreater(decided, 50)
+        # a red marble is outside the table
+        self.assertIsNone(self.tablebase.probe((1, 2, 4), 0, 0, "W"))
+
+    def test_solve_position(self):
+        layout = ["X" * 5 + "WB"] + ["X" * 7] * 6
+        game = KubaGame(("PlayerA", "W"), ("PlayerB", "B"), layout=layout)
+        self.assertIsNone(game.solve_position(self.tablebase))
+        self.assertEqual(game.solve_position(self.tablebase, "PlayerA"), (WIN, 1))
+        self.assertEqual(game.solve_position(self.tablebase, "PlayerB"),
+                         self.tablebase.probe((1 << 5, 1 << 6, 0), 0, 0, "B"))
+        self.assertTrue(game.make_move("PlayerA", (0, 5), "R"))
+        self.assertEqual(game.get_winner(), "PlayerA")
+        self.assertIsNone(game.solve_position(self.tablebase, "PlayerB"))
+        # the starting position and boards of other sizes are not in the table
+        self.assertIsNone(KubaGame(("PlayerA", "W"), ("PlayerB", "B")).solve_position(self.tablebase, "PlayerA"))
+        game = KubaGame(("PlayerA", "W"), ("PlayerB", "B"), layout=["X" * 7 + "WB"] + ["X" * 9] * 8)
+        self.assertIsNone(game.solve_position(self.tablebase, "PlayerA"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import io
+import json
+import unittest
+
+from Kubagame.record import GameRecordWriter, read_games
+from Kubagame.tournament import make_schedule, run_tournament
+
+
+class _Output(io.StringIO):
+    """A text file that counts the lines it holds each time it is flushed"""
+
+    def __init__(self):
+        super().__init__()
+        self.flushed = []
+
+    def flush(self):
+        super().flush()
+        self.flushed.append(self.getvalue().count("\n"))
+
+
+class TournamentTest(unittest.TestCase):
+    """Plays small tournaments between random and greedy bots"""
+
+    def _play(self, workers):
+        labels = ["random", "greedy"]
+        tasks = make_schedule(labels, labels, "roundrobin", 6, 0, 60)
+        output = _Output()
+        stream = io.BytesIO()
+        results = run_tournament(tasks, workers, output, GameRecordWriter(stream))
+        self.assertEqual([result["game"] for result in results], list(range(6)))
+        # every line is flushed as soon as it is written
+        self.assertEqual(output.flushed, list(range(1, 7)))
+        lines = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(sorted(lines, key=lambda result: result["game"]), results)
+        stream.seek(0)
+        self.assertEqual(sorted(len(record.get_move_codes()) for record in read_games(stream)),
+                         sorted(result["moves"] for result in results))
+        return results
+
+    def test_same_results_with_workers(self):
+        self.assertEqual([dict(result, duration=0) for result in self._play(1)],
+                         [dict(result, duration=0) for result in self._play(2)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+
+from Kubagame.ai import AlphaBetaPlayer
+from Kubagame.bitboard import encode_move
+from Kubagame.game import KubaGame
+from Kubagame.transposition import EXACT, LOWER, UPPER, TranspositionTable
+
+
+class TranspositionTableTest(unittest.TestCase):
+    """Checks that stored entries come back unchanged, on boards larger than 7 x 7 too"""
+
+    def test_store_and_probe(self):
+        table = TranspositionTable(1)
+        moves = [((0, 0), "L"), ((6, 6), "B"), ((1, 0), "L"), ((0, 7), "L"), ((8, 8), "B"), ((24, 24), "F")]
+        for key, move in enumerate(moves, 1):
+            table.store(key, key, -key * 1000, (EXACT, LOWER, UPPER)[key % 3], move)
+        for key, move in enumerate(moves, 1):
+            self.assertEqual(table.probe(key), (key, -key * 1000, (EXACT, LOWER, UPPER)[key % 3], move))
+        table.store(99, 3, 5, EXACT, None)
+        self.assertEqual(table.probe(99), (3, 5, EXACT, None))
+        self.assertIsNone(table.probe(100))
+
+    def test_encode_move_rejects_larger_boards(self):
+        self.assertEqual(encode_move((6, 6), "B"), 195)
+        with self.assertRaises(ValueError):
+            encode_move((0, 7), "L")
+
+    def test_search_on_larger_board(self):
+        game = KubaGame(("PlayerA", "W"), ("PlayerB", "B"), size=9)
+        player = AlphaBetaPlayer(time_limit=60, max_depth=2, tt_size_mb=1)
+        move = player.search(game, "PlayerA")[0]
+        self.assertIn(move, game.legal_moves("PlayerA"))
+
+
+if __name__ == "__main__":
+    unittest.main()